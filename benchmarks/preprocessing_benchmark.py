@@ -0,0 +1,93 @@
+"""
+Benchmark of the compiled preprocessing plans of data_processor against the
+previous implementation, which ran every step as a separate uncompiled re.sub pass.
+
+Run from the repository root: PYTHONPATH=src python benchmarks/preprocessing_benchmark.py
+"""
+import re
+import time
+from pathlib import Path
+
+from botok import TSEK
+
+from rules_generator.data_processor import (
+    prepare_gold_corpus_for_tokenizer,
+    transform_gold_corpus_for_tagging,
+)
+from rules_generator.Utility.regex_replacer import replace_with_regex
+
+SCALE = 50
+GOLD_CORPUS_PATH = (
+    Path(__file__).resolve().parent.parent / "src/rules_generator/data/TIB_train.txt"
+)
+
+
+def previous_filter_text(text: str, is_gold_corpus=False) -> str:
+    special_characters = {"?": " ", "+": "", "-": "", "༌": TSEK}
+    if is_gold_corpus:
+        special_characters = {"?": " ", "+": "", "༌": TSEK}
+
+    text = re.sub(
+        "|".join(re.escape(key) for key in special_characters.keys()),
+        lambda match: special_characters[match.group(0)],
+        text,
+    )
+    return replace_with_regex({r"[ ]+": " "}, text.strip())
+
+
+def previous_prepare_gold_corpus_for_tokenizer(gold_corpus: str) -> str:
+    text = previous_filter_text(gold_corpus)
+    return replace_with_regex({r"(?<=([^།])) (?=([^།]))": ""}, text)
+
+
+def previous_transform_gold_corpus_for_tagging(gold_corpus: str) -> str:
+    text = previous_filter_text(gold_corpus, is_gold_corpus=True)
+    patterns = {
+        "།[ ]+༄": "།_༄",
+        "༅[ ]+།": "༅_།",
+        "(?<=།) (?=།)": "_",
+        "[ ]+།": "_།",
+        "།[ ]+": "།_",
+        r"(?<![༅།_])([།_]+)": r" \1",
+        r"([།_]+)(?![༄།_])": r"\1 ",
+        r"([^་།_]) ([^ར ས འི འམ འང འོ འིའོ འིའམ འིའང འོའམ འོའང ། _])": r"\1\2",
+        r"(?<=[༠༡༢༣༤༥༦༧༨༩])([ ]+)(?=[༠༡༢༣༤༥༦༧༨༩])": r"",
+        r"\s*([༠༡༢༣༤༥༦༧༨༩]+)\s*": r" \1 ",
+        r"(?<=[^\u0F00-\u0FFF\s]) (?=[^\u0F00-\u0FFF\s])": r"",
+        r"\s*([^\u0F00-\u0FFF\s_-]+)\s*": r" \1 ",
+        r"((?![་།_༠༡༢༣༤༥༦༧༨༩])[\u0F00-\u0FFF]) (ར|ས|འི|འམ|འང|འོ|འིའོ|འིའམ|འིའང|འོའམ|འོའང)": r"\1-\2",
+    }
+    return replace_with_regex(patterns, text)
+
+
+def benchmark(function, text):
+    start = time.perf_counter()
+    result = function(text)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    gold_corpus = GOLD_CORPUS_PATH.read_text(encoding="utf-8") * SCALE
+    size_in_mb = len(gold_corpus.encode("utf-8")) / 1e6
+    print(f"{size_in_mb:.1f} MB of gold corpus")
+
+    for name, previous_function, current_function in [
+        (
+            "prepare_gold_corpus_for_tokenizer",
+            previous_prepare_gold_corpus_for_tokenizer,
+            prepare_gold_corpus_for_tokenizer,
+        ),
+        (
+            "transform_gold_corpus_for_tagging",
+            previous_transform_gold_corpus_for_tagging,
+            transform_gold_corpus_for_tagging,
+        ),
+    ]:
+        previous_output, previous_time = benchmark(previous_function, gold_corpus)
+        current_output, current_time = benchmark(current_function, gold_corpus)
+
+        assert current_output == previous_output, f"{name} outputs are not identical"
+        print(
+            f"{name}: {size_in_mb / previous_time:.1f} MB/s -> "
+            f"{size_in_mb / current_time:.1f} MB/s ({previous_time / current_time:.1f}x)"
+        )
@@ -0,0 +1,122 @@
+"""
+Benchmark of the syllable-offset alignment engine used by tagger() against the
+previous implementation, which re-joined and re-split the unmatched window on every step.
+
+Run from the repository root: PYTHONPATH=src python benchmarks/tagger_benchmark.py
+"""
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from rules_generator.data_processor import transform_gold_corpus_for_tagging
+from rules_generator.tagger import (
+    filter_hyphen,
+    filter_underscore,
+    split_words_into_syllables,
+    tag_syllables,
+    tag_words,
+)
+from rules_generator.tokenizer_pipeline import botok_word_tokenizer_pipeline
+from rules_generator.Utility.get_syllables import get_syllables
+
+SCALE = 100
+GOLD_CORPUS_PATH = (
+    Path(__file__).resolve().parent.parent / "src/rules_generator/data/TIB_train.txt"
+)
+
+
+def previous_find_next_matching_words(
+    tokenized_words: List[str],
+    gold_corpus_words: List[str],
+    tok_idx: int,
+    gold_idx: int,
+) -> Tuple[int, int]:
+    gold_last_idx, tok_last_idx = gold_idx, tok_idx
+
+    while tok_last_idx < len(tokenized_words) and gold_last_idx < len(
+        gold_corpus_words
+    ):
+        curr_tok_word = filter_underscore(tokenized_words[tok_last_idx])
+        curr_gold_word = filter_underscore(gold_corpus_words[gold_last_idx])
+        condition_1 = curr_tok_word == curr_gold_word
+
+        tok_window = tokenized_words[tok_idx : tok_last_idx + 1]  # noqa: E203
+        gold_window = gold_corpus_words[gold_idx : gold_last_idx + 1]  # noqa: E203
+
+        unmatched_tok_words = "".join(tok_window)
+        unmatched_gold_words = "".join(gold_window)
+        unmatched_tok_words = filter_underscore(filter_hyphen(unmatched_tok_words))
+        unmatched_gold_words = filter_underscore(filter_hyphen(unmatched_gold_words))
+        if condition_1 and unmatched_tok_words == unmatched_gold_words:
+            break
+
+        unmatched_tok_syls = split_words_into_syllables(tok_window)
+        unmatched_gold_syls = split_words_into_syllables(gold_window)
+        if len(unmatched_tok_syls) > len(unmatched_gold_syls):
+            gold_last_idx += 1
+        elif len(unmatched_tok_syls) < len(unmatched_gold_syls):
+            tok_last_idx += 1
+        else:
+            gold_last_idx += 1
+            tok_last_idx += 1
+
+    return gold_last_idx, tok_last_idx
+
+
+def previous_tag_words(tokenized_words: List[str], gold_corpus_words: List[str]) -> str:
+    gold_idx, tok_idx = 0, 0
+    tagged_content = ""
+
+    while tok_idx < len(tokenized_words) and gold_idx < len(gold_corpus_words):
+        if filter_underscore(tokenized_words[tok_idx]) == filter_underscore(
+            gold_corpus_words[gold_idx]
+        ):
+            tagged_content += tokenized_words[tok_idx] + "/U "
+            gold_idx += 1
+            tok_idx += 1
+            continue
+
+        gold_last_idx, tok_last_idx = previous_find_next_matching_words(
+            tokenized_words, gold_corpus_words, tok_idx, gold_idx
+        )
+        tagged_gold_syls = tag_syllables(gold_corpus_words[gold_idx:gold_last_idx])
+        tagged_gold_idx = 0
+        for tokenized_word in tokenized_words[tok_idx:tok_last_idx]:
+            syls = get_syllables(tokenized_word)
+            tags = "".join(
+                tagged_gold_syls[tagged_gold_idx + 2 * i + 1] for i in range(len(syls))
+            )
+            tagged_content += "".join(syls) + "/" + tags + " "
+            tagged_gold_idx += 2 * len(syls)
+        gold_idx, tok_idx = gold_last_idx, tok_last_idx
+
+    return tagged_content
+
+
+def benchmark(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    gold_corpus = GOLD_CORPUS_PATH.read_text(encoding="utf-8")
+
+    # botok runs once on the original corpus, only the alignment is scaled up
+    gold_corpus_words = transform_gold_corpus_for_tagging(gold_corpus).split() * SCALE
+    tokenized_words = botok_word_tokenizer_pipeline(gold_corpus).split() * SCALE
+    print(
+        f"{len(gold_corpus_words)} gold words, {len(tokenized_words)} tokenized words"
+    )
+
+    previous_output, previous_time = benchmark(
+        previous_tag_words, tokenized_words, gold_corpus_words
+    )
+    current_output, current_time = benchmark(
+        tag_words, tokenized_words, gold_corpus_words
+    )
+
+    assert current_output == previous_output, "Tagged outputs are not identical"
+    print(f"previous alignment: {previous_time:.2f}s")
+    print(f"syllable-offset alignment: {current_time:.2f}s")
+    print(f"speedup: {previous_time / current_time:.1f}x")
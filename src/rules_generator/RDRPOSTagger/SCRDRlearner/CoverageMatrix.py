@@ -0,0 +1,189 @@
+import numpy as np
+
+# Index of the lowest set bit of every byte (8 for 0)
+LOWEST_BIT = np.array(
+    [(byte & -byte).bit_length() - 1 if byte else 8 for byte in range(256)],
+    dtype=np.int64,
+)
+# Improvement of the rules which do not match any target object anymore
+NO_CANDIDATE = np.iinfo(np.int64).min
+
+
+def packCoverage(rowStarts, matchRows, rowCount, objectCount):
+    """
+    Coverage bitset of the candidates: one byte of bits of 8 objects by candidate
+    on each line, the first objects matched by tied candidates are found by lines
+    rowStarts, matchRows: candidate rows matched by the object at each position,
+    matchRows[rowStarts[position] : rowStarts[position + 1]]
+    """
+    coverage = np.zeros(((objectCount + 7) // 8, rowCount), dtype=np.uint8)
+    positions = np.repeat(np.arange(objectCount, dtype=np.int64), np.diff(rowStarts))
+    bits = np.left_shift(1, positions & 7).astype(np.uint8)
+    np.bitwise_or.at(coverage, (positions >> 3, matchRows), bits)
+    return coverage
+
+
+class CoverageMatrix:
+    """
+    NumPy backend of ImprovementQueue: the improvements of all the candidate rules are
+    kept in arrays of weighted match counts. The candidate rows matched by each object
+    are stored in CSR form (rowStarts, matchRows), removing objects subtracts their
+    weights from the counts of their rows only, with np.bincount, and rescores these
+    rows. getBestRule takes the maximum of the improvement array, nothing is popcounted.
+
+    The packed coverage bitset of the target objects is only used with the alive bits
+    of the objects to break ties: candidates with the same improvement are ranked as
+    in ImprovementQueue, by the first object they match and their position in the
+    rules of that object.
+    """
+
+    def __init__(self, ruleIndex, correctIndex):
+        # ruleIndex: RuleIndex of the target objects
+        # correctIndex: RuleIndex of the correctly tagged objects
+        self.ruleIndex = ruleIndex
+
+        self.rules = []
+        rows = {}
+        for rules in ruleIndex.objectRules.values():
+            for rule in rules:
+                if rule not in rows:
+                    rows[rule] = len(self.rules)
+                    self.rules.append(rule)
+
+        self.targetPositions = {
+            objectId: position
+            for position, objectId in enumerate(ruleIndex.objectRules)
+        }
+        self.correctPositions = {
+            objectId: position
+            for position, objectId in enumerate(correctIndex.objectRules)
+        }
+        self.targetMatches = self.getMatches(ruleIndex, rows)
+        self.correctMatches = self.getMatches(correctIndex, rows)
+        self.targetCoverage = packCoverage(
+            *self.targetMatches, len(self.rules), len(self.targetPositions)
+        )
+        self.targetAlive = self.getAliveBits(len(self.targetPositions))
+        self.correctAlive = self.getAliveBits(len(self.correctPositions))
+
+        self.targetWeights = self.getPositionWeights(ruleIndex)
+        self.correctWeights = self.getPositionWeights(correctIndex)
+        self.targetCounts = np.array(
+            [ruleIndex.counts[rule] for rule in self.rules], dtype=np.int64
+        )
+        self.correctCounts = np.array(
+            [correctIndex.counts.get(rule, 0) for rule in self.rules], dtype=np.int64
+        )
+        self.improvements = np.empty(len(self.rules), dtype=np.int64)
+        self.scoreRows(np.arange(len(self.rules)))
+
+    def getAliveBits(self, objectCount):
+        alive = np.full((objectCount + 7) // 8, 0xFF, np.uint8)
+        if objectCount % 8:
+            alive[-1] = (1 << (objectCount % 8)) - 1
+        return alive
+
+    def getPositionWeights(self, ruleIndex):
+        # Weight of the object at each position
+        return np.array(
+            [ruleIndex.getWeight(objectId) for objectId in ruleIndex.objectRules],
+            dtype=np.int64,
+        )
+
+    def getMatches(self, ruleIndex, rows):
+        # (rowStarts, matchRows) of the candidate rows matched by each object
+        rowStarts = [0]
+        matchRows = []
+        for rules in ruleIndex.objectRules.values():
+            for rule in rules:
+                row = rows.get(rule)
+                if row is not None:
+                    matchRows.append(row)
+            rowStarts.append(len(matchRows))
+        return np.array(rowStarts, dtype=np.int64), np.array(matchRows, dtype=np.int64)
+
+    def removeObjects(self, objectIds, positions, matches, alive, weights):
+        """
+        Clears the alive bits of the objects and returns the candidate rows they were
+        matching, with the weight of the removed objects matched by each row
+        """
+        positions = np.array([positions[id] for id in objectIds], dtype=np.int64)
+        bits = np.left_shift(1, positions & 7).astype(np.uint8)
+        isAlive = (alive[positions >> 3] & bits) != 0
+        positions, bits = positions[isAlive], bits[isAlive]
+        np.bitwise_and.at(alive, positions >> 3, ~bits)
+
+        rowStarts, matchRows = matches
+        starts = rowStarts[positions]
+        lengths = rowStarts[positions + 1] - starts
+        # Indexes of the matches of all the positions in matchRows
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        rows = matchRows[offsets + np.arange(lengths.sum())]
+        rows, inverse = np.unique(rows, return_inverse=True)
+        removed = np.bincount(inverse, weights=np.repeat(weights[positions], lengths))
+        return rows, removed.astype(np.int64)
+
+    def scoreRows(self, rows):
+        targetCounts = self.targetCounts[rows]
+        self.improvements[rows] = np.where(
+            targetCounts > 0, targetCounts - self.correctCounts[rows], NO_CANDIDATE
+        )
+
+    def update(self, rules, removedObjects=()):
+        # rules: rules whose improvement was raised, they are rescored from the
+        # removed objects anyway
+        # removedObjects: ids of the objects removed from the object set
+        targetIds = [id for id in removedObjects if id in self.targetPositions]
+        correctIds = [id for id in removedObjects if id in self.correctPositions]
+        if targetIds:
+            rows, removed = self.removeObjects(
+                targetIds,
+                self.targetPositions,
+                self.targetMatches,
+                self.targetAlive,
+                self.targetWeights,
+            )
+            self.targetCounts[rows] -= removed
+            self.scoreRows(rows)
+        if correctIds:
+            rows, removed = self.removeObjects(
+                correctIds,
+                self.correctPositions,
+                self.correctMatches,
+                self.correctAlive,
+                self.correctWeights,
+            )
+            self.correctCounts[rows] -= removed
+            self.scoreRows(rows)
+
+    def getUpperBound(self):
+        # A rule can not improve more objects than it matches
+        return int(self.targetCounts.max(initial=0))
+
+    def getFirstPositions(self, rows):
+        # Position of the first target object left matched by each candidate row
+        coverage = self.targetCoverage[:, rows] & self.targetAlive[:, None]
+        firstBytes = np.argmax(coverage != 0, axis=0)
+        lowestBits = LOWEST_BIT[coverage[firstBytes, np.arange(len(rows))]]
+        return firstBytes * 8 + lowestBits
+
+    def getBestRule(self):
+        """
+        Returns the candidate rule with the highest improvement and its improvement,
+        (None, None) if there is no candidate
+        """
+        maxImp = self.improvements.max(initial=NO_CANDIDATE)
+        if maxImp == NO_CANDIDATE:
+            return None, None
+        bestRows = np.flatnonzero(self.improvements == maxImp)
+        if len(bestRows) > 1:
+            # Ties go to the first object matched, then the first of its rules
+            firstPositions = self.getFirstPositions(bestRows)
+            bestRows = bestRows[firstPositions == firstPositions.min()]
+        if len(bestRows) > 1:
+            objectId = self.ruleIndex.getMatchingObjects(self.rules[bestRows[0]])[0]
+            rules = self.ruleIndex.objectRules[objectId]
+            bestRule = min((self.rules[row] for row in bestRows), key=rules.index)
+        else:
+            bestRule = self.rules[bestRows[0]]
+        return bestRule, int(maxImp)
@@ -0,0 +1,86 @@
+from heapq import heapify, heappop, heappush
+
+
+class ImprovementQueue:
+    """
+    Lazy-greedy max-heap of the improvement of the candidate rules correcting the objects
+    of one target tag: (number of target objects matched by the rule) - (number of
+    correctly tagged objects matched by the rule).
+
+    A rule is ranked by improvement, then by the first object it matches and its position
+    in the rules of that object, i.e. the order in which the rules are generated.
+    Removing objects can only lower an improvement or delay a rank, such entries are
+    recomputed when they reach the top of the heap. Removing correctly tagged objects
+    raises improvements, the changed rules are pushed again with update.
+    """
+
+    def __init__(self, ruleIndex, correctIndex):
+        # ruleIndex: RuleIndex of the target objects
+        # correctIndex: RuleIndex of the correctly tagged objects
+        self.ruleIndex = ruleIndex
+        self.correctCounts = correctIndex.counts
+
+        # Rank of the rules: (first matched object, position of the rule in its rules)
+        self.ranks = {}
+        ranks = self.ranks
+        for objectId, rules in ruleIndex.objectRules.items():
+            for position, rule in enumerate(rules):
+                if rule not in ranks:
+                    ranks[rule] = (objectId, position)
+
+        correctCounts = self.correctCounts
+        self.heap = [
+            ((correctCounts.get(rule, 0) - count, ranks[rule]), rule)
+            for rule, count in ruleIndex.counts.items()
+            if count > 0
+        ]
+        heapify(self.heap)
+
+    def getRank(self, rule):
+        rank = self.ranks[rule]
+        objectRules = self.ruleIndex.objectRules
+        if rank[0] not in objectRules:
+            objectId = self.ruleIndex.getMatchingObjects(rule)[0]
+            rank = (objectId, objectRules[objectId].index(rule))
+            self.ranks[rule] = rank
+        return rank
+
+    def getKey(self, rule):
+        # None if the rule does not match any target object anymore
+        count = self.ruleIndex.counts.get(rule, 0)
+        if count <= 0:
+            return None
+        return (self.correctCounts.get(rule, 0) - count, self.getRank(rule))
+
+    def update(self, rules, removedObjects=()):
+        # rules: rules whose improvement was raised
+        # removedObjects: ids of the objects removed from the object set, their
+        # rules are rescored lazily
+        for rule in rules:
+            key = self.getKey(rule)
+            if key is not None:
+                heappush(self.heap, (key, rule))
+
+    def getUpperBound(self):
+        # Upper bound of the improvement of the best rule, without recomputing the
+        # stale entries: they can only overestimate the improvement of their rule
+        if not self.heap:
+            return 0
+        return -self.heap[0][0][0]
+
+    def getBestRule(self):
+        """
+        Returns the candidate rule with the highest improvement and its improvement,
+        (None, None) if there is no candidate
+        """
+        heap = self.heap
+        while heap:
+            key, rule = heap[0]
+            currentKey = self.getKey(rule)
+            if currentKey == key:
+                return rule, -key[0]
+            heappop(heap)
+            # A raised improvement was already pushed by update
+            if currentKey is not None and currentKey > key:
+                heappush(heap, (currentKey, rule))
+        return None, None
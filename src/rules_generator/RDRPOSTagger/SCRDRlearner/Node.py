@@ -1,6 +1,7 @@
 class Node:
     """
-    A class to represent the nodes in SCRDR tree
+    A class to represent the nodes in SCRDR tree,
+    the conclusion of a node is the tag it gives to the objects satisfying its condition
     """
 
     def __init__(
@@ -22,32 +23,31 @@ class Node:
         self.depth = depth
 
     def satisfied(self, object):
-        return eval(self.condition)
+        return self.condition.isSatisfied(object)
 
     def executeConclusion(self, object):
-        exec(self.conclusion)
+        object.conclusion = self.conclusion
 
     def appendCornerstoneCase(self, object):
         self.cornerstoneCases.append(object)
 
     def check(self, object):
-        if self.satisfied(object):
-            self.executeConclusion(object)
-            if self.exceptChild is not None:
-                self.exceptChild.check(object)
-        else:
-            if self.elseChild is not None:
-                self.elseChild.check(object)
+        node = self
+        while node is not None:
+            if node.satisfied(object):
+                node.executeConclusion(object)
+                node = node.exceptChild
+            else:
+                node = node.elseChild
 
     def checkDepth(self, object, length):
-        if self.depth <= length:
-            if self.satisfied(object):
-                self.executeConclusion(object)
-                if self.exceptChild is not None:
-                    self.exceptChild.checkDepth(object, length)
+        node = self
+        while node is not None and node.depth <= length:
+            if node.satisfied(object):
+                node.executeConclusion(object)
+                node = node.exceptChild
             else:
-                if self.elseChild is not None:
-                    self.elseChild.checkDepth(object, length)
+                node = node.elseChild
 
     def findRealFather(self):
         node = self
@@ -76,10 +76,17 @@ class Node:
         self.exceptChild = node
         return True
 
-    def writeToFileWithSeenCases(self, out, depth):
+    def toStr(self):
+        # Eg: 'object.tag == "U" : object.conclusion = "U"'
+        return str(self.condition) + ' : object.conclusion = "' + self.conclusion + '"'
+
+    def writeToFileWithSeenCases(self, out, depth, objectStore=None):
+        # objectStore: store of the cornerstone cases if they are object ids
         space = tabStr(depth)
-        out.write(space + self.condition + " : " + self.conclusion + "\n")
+        out.write(space + self.toStr() + "\n")
         for case in self.cornerstoneCases:
+            if objectStore is not None:
+                case = objectStore.getObject(case)
             out.write(" " + space + "cc: " + case.toStr() + "\n")
         if self.exceptChild is not None:
             self.exceptChild.writeToFile(out, depth + 1)
@@ -87,12 +94,16 @@ class Node:
             self.elseChild.writeToFile(out, depth)
 
     def writeToFile(self, out, depth):
-        space = tabStr(depth)
-        out.write(space + self.condition + " : " + self.conclusion + "\n")
-        if self.exceptChild is not None:
-            self.exceptChild.writeToFile(out, depth + 1)
-        if self.elseChild is not None:
-            self.elseChild.writeToFile(out, depth)
+        # Writes the nodes in depth-first order from a stack of (node, depth),
+        # the exceptions of a node before its else child
+        nodes = [(self, depth)]
+        while nodes:
+            node, depth = nodes.pop()
+            out.write(tabStr(depth) + node.toStr() + "\n")
+            if node.elseChild is not None:
+                nodes.append((node.elseChild, depth))
+            if node.exceptChild is not None:
+                nodes.append((node.exceptChild, depth + 1))
 
 
 def tabStr(length):
@@ -80,6 +80,11 @@ def getWordTag(wordTag):
 
 
 def getObject(wordTags, wordPOS, index):  # Sequence of "Word/Tag"
+    return Object(*getObjectValues(wordTags, wordPOS, index))
+
+
+def getObjectValues(wordTags, wordPOS, index):
+    # Values of the attributes of Object, in the order of Object.attributes
     word, tag = getWordTag(wordTags[index])
     pos = wordPOS[index]
     preWord1 = preTag1 = prePos1 = preWord2 = preTag2 = prePos2 = ""
@@ -107,7 +112,7 @@ def getObject(wordTags, wordPOS, index):  # Sequence of "Word/Tag"
         nextWord2, nextTag2 = getWordTag(wordTags[index + 2])
         nextPos2 = wordPOS[index + 2]
 
-    return Object(
+    return (
         word,
         tag,
         pos,
@@ -122,7 +127,7 @@ def getObject(wordTags, wordPOS, index):  # Sequence of "Word/Tag"
         prePos2,
         prePos1,
         nextPos1,
-        nextPos2
+        nextPos2,
         # suffixL2,
         # suffixL3,
         # suffixL4,
@@ -137,26 +142,57 @@ def add_newline_to_shad(Corpus_string):
     return new_Corpus
 
 
-def getObjectDictionary(initializedCorpus, goldStandardCorpus, string_argument):
+def splitPOSBySentence(sentences, POS_list):
+    # POS of the words of each non empty sentence, from the POS of all the words
+    sentencesPOS = []
+    counter = 0
+    for sentence in sentences:
+        wordCount = len(sentence.split())
+        if wordCount:
+            sentencesPOS.append(POS_list[counter : counter + wordCount])  # noqa
+            counter += wordCount
+    return sentencesPOS
+
+
+def getObjectDictionary(
+    initializedCorpus,
+    goldStandardCorpus,
+    string_argument,
+    sentencesPOS=None,
+    objectStore=None,
+    deduplicate=False,
+):
+    # sentencesPOS: POS of the words of each sentence of initializedCorpus, split at
+    # shads by add_newline_to_shad (eg: from tagger.group_POS_by_sentence)
+    # Fallback if not given: the words are tokenized again by botok, which may not
+    # give one POS per word, and the POS are split by counting the words of each sentence
+    # objectStore: ObjectStore receiving the objects, the lists of the returned
+    # dictionary then hold object ids instead of Object instances
+    # deduplicate: identical objects with the same correct tag are stored once in
+    # objectStore, with their number of occurrences as weight
 
     if not string_argument:
         goldStandardCorpus = open(goldStandardCorpus, encoding="utf-8").read()
         initializedCorpus = open(initializedCorpus, encoding="utf-8").read()
 
     # Getting values for POS values
-    init_without_tags = Remove_tag_in_String(initializedCorpus)
-    POS_list = Get_CONTENT_POS_attributes(init_without_tags)
+    if sentencesPOS is None:
+        init_without_tags = Remove_tag_in_String(initializedCorpus)
+        POS_list = Get_CONTENT_POS_attributes(init_without_tags)
 
     goldStandardCorpus = add_newline_to_shad(goldStandardCorpus)
     initializedCorpus = add_newline_to_shad(initializedCorpus)
 
     goldStandardSens = goldStandardCorpus.splitlines()
     initializedSens = initializedCorpus.splitlines()
+    if sentencesPOS is None:
+        sentencesPOS = splitPOSBySentence(initializedSens, POS_list)
 
     objects: Dict[str, Dict[str, list]] = {}  # objects = {}
+    objectIds: Dict[tuple, int] = {}
 
     j = 0
-    counter = 0
+    sentenceIndex = 0
     for i in range(len(initializedSens)):
         init = initializedSens[i].strip()
 
@@ -179,8 +215,17 @@ def getObjectDictionary(initializedCorpus, goldStandardCorpus, string_argument):
             gold.replace("“", "''").replace("”", "''").replace('"', "''").split()
         )
 
-        pos_list = POS_list[counter : counter + len(initWordTags)]  # noqa
-        counter += len(initWordTags)
+        pos_list = (
+            sentencesPOS[sentenceIndex] if sentenceIndex < len(sentencesPOS) else []
+        )
+        sentenceIndex += 1
+        if len(pos_list) != len(initWordTags):
+            print(
+                "\nERROR (POS do not match the words of the sentence || Some sentence is incorrectly formatted):"
+            )
+            print(str(i + 1) + "th initialized sentence: " + " ".join(initWordTags))
+            print(str(i + 1) + "th sentence POS:         " + " ".join(pos_list))
+            return None
 
         for k in range(len(initWordTags)):
             initWordTags[k] = initWordTags[k].replace("_", " ")
@@ -208,7 +253,20 @@ def getObjectDictionary(initializedCorpus, goldStandardCorpus, string_argument):
             if correctTag not in objects[initTag].keys():
                 objects[initTag][correctTag] = []
 
-            objects[initTag][correctTag].append(getObject(initWordTags, pos_list, k))
+            if objectStore is None:
+                object = getObject(initWordTags, pos_list, k)
+            elif deduplicate:
+                values = getObjectValues(initWordTags, pos_list, k)
+                key = (correctTag, *values)
+                if key in objectIds:
+                    objectStore.addOccurrence(objectIds[key])
+                    continue
+                object = objectIds[key] = objectStore.addObject(*values)
+            else:
+                object = objectStore.addObject(
+                    *getObjectValues(initWordTags, pos_list, k)
+                )
+            objects[initTag][correctTag].append(object)
 
     return objects
 
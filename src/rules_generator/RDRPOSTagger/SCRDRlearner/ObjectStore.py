@@ -0,0 +1,74 @@
+from array import array
+from typing import Dict, List
+
+from .Object import Object
+
+
+class Vocabulary:
+    """
+    Interns the words, tags and POS of the training corpus into consecutive int ids
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def getId(self, string):
+        id = self.ids.get(string)
+        if id is None:
+            id = len(self.strings)
+            self.ids[string] = id
+            self.strings.append(string)
+        return id
+
+    def getString(self, id):
+        return self.strings[id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class ObjectStore:
+    """
+    Training objects of the RDR learner stored column by column: one int column per
+    attribute of Object (the 5-word window with its tags and POS), holding vocabulary ids.
+    An object is its index in the columns, Object instances are only built on demand.
+    The weight of an object is the number of identical objects it stands for.
+    """
+
+    def __init__(self):
+        self.vocabulary = Vocabulary()
+        self.columns = {attribute: array("i") for attribute in Object.attributes}
+        # Same columns indexed by the position of their attribute in Object.attributes
+        self.attributeColumns = [
+            self.columns[attribute] for attribute in Object.attributes
+        ]
+        self.weights = array("i")
+
+    def addObject(self, *values):
+        objectId = len(self)
+        getId = self.vocabulary.getId
+        for attribute, value in zip(Object.attributes, values):
+            self.columns[attribute].append(getId(value))
+        self.weights.append(1)
+        return objectId
+
+    def addOccurrence(self, objectId):
+        # Counts another occurrence of an object already stored
+        self.weights[objectId] += 1
+
+    def getValue(self, objectId, attribute):
+        return self.vocabulary.strings[self.columns[attribute][objectId]]
+
+    def getValues(self, objectId, attributes):
+        strings = self.vocabulary.strings
+        return [strings[self.columns[attribute][objectId]] for attribute in attributes]
+
+    def getIds(self, objectId, attributeIndexes):
+        return [self.attributeColumns[index][objectId] for index in attributeIndexes]
+
+    def getObject(self, objectId):
+        return Object(*self.getValues(objectId, Object.attributes))
+
+    def __len__(self):
+        return len(self.columns["word"])
@@ -0,0 +1,72 @@
+from .Object import Object
+
+# A rule is a tuple of (slot, value id) conditions, in the order they are written in the
+# .RDR file, a slot being the index of the attribute in Object.attributes
+# Eg: ((WORD_SLOT, id of "ལ་"), (POS_SLOT, id of "PART"))
+#     -> 'object.word == "ལ་" and object.pos == "PART"'
+WORD_SLOT = Object.attributes.index("word")
+TAG_SLOT = Object.attributes.index("tag")
+POS_SLOT = Object.attributes.index("pos")
+
+# Slots of the 5-word window, from prevWord2 to nextWord2
+WINDOW_WORD_SLOTS = [
+    Object.attributes.index(attribute)
+    for attribute in ["prevWord2", "prevWord1", "word", "nextWord1", "nextWord2"]
+]
+WINDOW_POS_SLOTS = [
+    Object.attributes.index(attribute)
+    for attribute in ["prevPos2", "prevPos1", "pos", "nextPos1", "nextPos2"]
+]
+
+
+def renderRule(rule, vocabulary):
+    if not rule:
+        return "True"
+    return " and ".join(
+        "object." + Object.attributes[slot] + ' == "' + vocabulary.getString(id) + '"'
+        for slot, id in rule
+    )
+
+
+def compileRule(objectStore, rule):
+    """
+    Returns a function telling whether a stored object satisfies the rule
+    Eg: compileRule(objectStore, rule)(objectId) -> True
+    """
+    conditions = [(objectStore.attributeColumns[slot], id) for slot, id in rule]
+    if len(conditions) == 1:
+        column, id = conditions[0]
+        return lambda objectId: column[objectId] == id
+
+    def isSatisfied(objectId):
+        for column, id in conditions:
+            if column[objectId] != id:
+                return False
+        return True
+
+    return isSatisfied
+
+
+class Condition:
+    """
+    Condition of a learned node: a rule and the vocabulary of its value ids,
+    the rule is only rendered as .RDR text when the tree is written
+    """
+
+    __slots__ = ("rule", "vocabulary")
+
+    def __init__(self, rule, vocabulary):
+        self.rule = rule
+        self.vocabulary = vocabulary
+
+    def isSatisfied(self, object):
+        # object: Object instance
+        for slot, id in self.rule:
+            if getattr(object, Object.attributes[slot]) != self.vocabulary.getString(
+                id
+            ):
+                return False
+        return True
+
+    def __str__(self):
+        return renderRule(self.rule, self.vocabulary)
@@ -0,0 +1,58 @@
+import sys
+from array import array
+from typing import Dict, List
+
+
+class RuleCache:
+    """
+    Candidate rules of the objects of an ObjectStore, generated once per object and
+    interned into consecutive int rule ids. The rule ids of an object are kept in an
+    int array, in the order generateRules gives them.
+    Eg:
+        ruleIds = cache.add(objectId, generateRules(objectStore, objectId))
+        cache.getRule(ruleIds[0]) -> ((WORD_SLOT, id of "ལ་"),)
+    """
+
+    def __init__(self):
+        self.ids: Dict[tuple, int] = {}
+        self.rules: List[tuple] = []
+        self.objectRuleIds: Dict[int, array] = {}
+
+    def add(self, objectId, rules):
+        ids = self.ids
+        ruleIds = array("i")
+        for rule in rules:
+            id = ids.get(rule)
+            if id is None:
+                id = len(self.rules)
+                ids[rule] = id
+                self.rules.append(rule)
+            ruleIds.append(id)
+        self.objectRuleIds[objectId] = ruleIds
+        return ruleIds
+
+    def get(self, objectId):
+        # None if the rules of the object are not cached yet
+        return self.objectRuleIds.get(objectId)
+
+    def getRule(self, ruleId):
+        return self.rules[ruleId]
+
+    def getMemoryUsage(self):
+        """
+        Approximate number of bytes held by the cache: the interned rules, the rule
+        ids of the objects and the dictionaries indexing them
+        """
+        size = sys.getsizeof(self.ids) + sys.getsizeof(self.rules)
+        size += sys.getsizeof(self.objectRuleIds)
+        for rule in self.rules:
+            size += sys.getsizeof(rule) + sum(sys.getsizeof(term) for term in rule)
+        for ruleIds in self.objectRuleIds.values():
+            size += sys.getsizeof(ruleIds)
+        return size
+
+    def __contains__(self, objectId):
+        return objectId in self.objectRuleIds
+
+    def __len__(self):
+        return len(self.objectRuleIds)
@@ -0,0 +1,84 @@
+from typing import Dict, Hashable, List, Sequence
+
+
+class RuleIndex:
+    """
+    Inverted index of the candidate rules of an object set: for every rule, the ids of
+    the objects it matches (posting list, in object set order) and the total weight
+    of the ones not covered yet, an object standing for its identical occurrences.
+    The rules of every object are kept, so covering or removing objects updates the
+    counts without generating their rules again.
+    Rules are any hashable values, the learner indexes the rule ids of its RuleCache.
+    Eg:
+        index = RuleIndex((objectId, learner.getRuleIds(objectId)) for ...)
+        index.cover(index.postings[rule])
+    """
+
+    def __init__(self, objectRules, ruleNotIn=(), weights=None):
+        # objectRules: (object id, rules of the object) pairs
+        # ruleNotIn: rules which are not candidates, eg: rules of the cornerstone cases
+        # weights: weight of each object id (eg: ObjectStore.weights), 1 if not given
+        self.counts: Dict[Hashable, int] = {}
+        self.postings: Dict[Hashable, List[int]] = {}
+        self.objectRules: Dict[int, Sequence] = {}
+        self.weights = weights
+        # Total weight of the objects of the set
+        self.total = 0
+        # Number of remove calls, and their number when each posting list was filtered
+        self.removals = 0
+        self.postingRemovals: Dict[Hashable, int] = {}
+
+        counts = self.counts
+        postings = self.postings
+        for objectId, rules in objectRules:
+            if ruleNotIn:
+                rules = [rule for rule in rules if rule not in ruleNotIn]
+            self.objectRules[objectId] = rules
+            weight = 1 if weights is None else weights[objectId]
+            self.total += weight
+            for rule in rules:
+                if rule in counts:
+                    counts[rule] += weight
+                    postings[rule].append(objectId)
+                else:
+                    counts[rule] = weight
+                    postings[rule] = [objectId]
+
+    def getWeight(self, objectId):
+        return 1 if self.weights is None else self.weights[objectId]
+
+    def cover(self, objectIds):
+        """
+        Decrements the count of every rule of the objects, an object covered by several
+        rules is decremented each time
+        """
+        counts = self.counts
+        for objectId in objectIds:
+            weight = self.getWeight(objectId)
+            for rule in self.objectRules[objectId]:
+                counts[rule] -= weight
+
+    def remove(self, objectIds):
+        """
+        Removes objects from the object set, they are dropped from the posting lists
+        when the lists are read
+        """
+        counts = self.counts
+        self.removals += 1
+        for objectId in objectIds:
+            weight = self.getWeight(objectId)
+            self.total -= weight
+            for rule in self.objectRules.pop(objectId):
+                counts[rule] -= weight
+
+    def getMatchingObjects(self, rule):
+        # Objects of the set matching the rule, in object set order
+        objectRules = self.objectRules
+        postings = self.postings.get(rule)
+        if postings is None:
+            return []
+        if self.postingRemovals.get(rule, 0) != self.removals:
+            postings = [objectId for objectId in postings if objectId in objectRules]
+            self.postings[rule] = postings
+            self.postingRemovals[rule] = self.removals
+        return postings
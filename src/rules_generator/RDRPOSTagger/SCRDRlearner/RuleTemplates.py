@@ -0,0 +1,41 @@
+from typing import NamedTuple, Tuple
+
+
+class RuleTemplates(NamedTuple):
+    """
+    Candidate rules generated for each object of the learner.
+    spans: (start, end) spans of the 5-word window the rules test, in generation order,
+    0 being prevWord2, 2 the word itself and 4 nextWord2 (end excluded)
+    usePOS: whether the rules may test the POS of the words of the span, alone or
+    with the word, else they only test the words
+    Eg: RuleTemplates(((2, 4),), False) -> 'object.word == "ཕྱག་" and
+    object.nextWord1 == "འཚལ་"'
+    """
+
+    spans: Tuple[Tuple[int, int], ...]
+    usePOS: bool = True
+
+
+FULL_WINDOW_SPANS = tuple(
+    (start, end) for start in range(0, 3) for end in range(5, 2, -1)
+)
+# Spans from prevWord1 to nextWord1
+WINDOW_1_SPANS = ((1, 4), (1, 3), (2, 4), (2, 3))
+
+FULL_RULE_TEMPLATES = RuleTemplates(FULL_WINDOW_SPANS)
+
+RULE_TEMPLATE_SETS = {
+    "full": FULL_RULE_TEMPLATES,
+    "word": RuleTemplates(FULL_WINDOW_SPANS, False),
+    "window1": RuleTemplates(WINDOW_1_SPANS),
+    "word-window1": RuleTemplates(WINDOW_1_SPANS, False),
+}
+
+
+def getRuleTemplates(templates):
+    # templates: RuleTemplates or the name of one of RULE_TEMPLATE_SETS
+    if isinstance(templates, RuleTemplates):
+        return templates
+    if templates not in RULE_TEMPLATE_SETS:
+        raise ValueError(f"Unknown rule templates: {templates}")
+    return RULE_TEMPLATE_SETS[templates]
@@ -22,7 +22,7 @@ class SCRDRTree:
 
     def writeToFileWithSeenCases(self, outFile):
         out = open(outFile, "w", encoding="utf-8")
-        self.root.writeToFileWithSeenCases(out, 0)
+        self.root.writeToFileWithSeenCases(out, 0, getattr(self, "objectStore", None))
         out.close()
 
     def writeToFile(self, outFile, return_string=False):
@@ -1,230 +1,290 @@
-from typing import Dict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, NamedTuple, Optional
 
 from ordered_set import OrderedSet
 
+from .ImprovementQueue import ImprovementQueue
 from .Node import Node
 from .Object import getObjectDictionary
+from .ObjectStore import ObjectStore
+from .Rule import TAG_SLOT, WINDOW_POS_SLOTS, WINDOW_WORD_SLOTS, Condition, compileRule
+from .RuleCache import RuleCache
+from .RuleIndex import RuleIndex
+from .RuleTemplates import FULL_RULE_TEMPLATES, getRuleTemplates
 from .SCRDRTree import SCRDRTree
 
 NO_POS = "NO_POS"
 empty_POS = ""
 
+# Rules of less than 2 shards of objects are generated in the main process
+RULE_COUNTING_SHARD_SIZE = 2048
+
 
 def make_rules(
-    index, start_index, end_index, current_rule, wordrules, posrules, object_pos_list
+    index,
+    start_index,
+    end_index,
+    current_rule,
+    wordrules,
+    posrules,
+    object_pos_list,
+    use_pos=True,
 ):
+    # use_pos: whether the rules may test the POS, else they only test the words
+    has_pos = use_pos and object_pos_list[index] not in [NO_POS, empty_POS]
     if start_index == 2 and index == 2 and index == end_index - 1:
-        if object_pos_list[index] not in [NO_POS, empty_POS]:
+        if has_pos:
             return [
-                current_rule + wordrules[index] + " and " + posrules[index],
+                current_rule + wordrules[index] + posrules[index],
             ]
         else:
             return [current_rule + wordrules[index]]
     if index == 2 and index == end_index - 1:
-        if object_pos_list[index] not in [NO_POS, empty_POS]:
+        if has_pos:
             return [
                 current_rule + wordrules[index],
-                current_rule + wordrules[index] + " and " + posrules[index],
+                current_rule + wordrules[index] + posrules[index],
             ]
         else:
             return [current_rule + wordrules[index]]
     if index == end_index - 1:
-        if object_pos_list[index] not in [NO_POS, empty_POS]:
+        if has_pos:
             return [
                 current_rule + posrules[index],
                 current_rule + wordrules[index],
-                current_rule + wordrules[index] + " and " + posrules[index],
+                current_rule + wordrules[index] + posrules[index],
             ]
         else:
             return [current_rule + wordrules[index]]
 
     pos_rules = []
-    if index != 2:
+    if index != 2 and use_pos:
         pos_rules = make_rules(
             index + 1,
             index,
             end_index,
-            current_rule + posrules[index] + " and ",
+            current_rule + posrules[index],
             wordrules,
             posrules,
             object_pos_list,
+            use_pos,
         )
     word_rules = make_rules(
         index + 1,
         index,
         end_index,
-        current_rule + wordrules[index] + " and ",
+        current_rule + wordrules[index],
         wordrules,
         posrules,
         object_pos_list,
+        use_pos,
     )
 
     word_and_pos_rules = []
-    if object_pos_list[index] not in [NO_POS, empty_POS]:
+    if has_pos:
         word_and_pos_rules = make_rules(
             index + 1,
             index,
             end_index,
-            current_rule + wordrules[index] + " and " + posrules[index] + " and ",
+            current_rule + wordrules[index] + posrules[index],
             wordrules,
             posrules,
             object_pos_list,
+            use_pos,
         )
     return pos_rules + word_rules + word_and_pos_rules
 
 
-# Generate concrete rules based on input object of 5-word window context object
-def generateRules(object):
-    # 1. Current word
-    rule1 = 'object.word == "' + object.word + '"'
-    # 2. Next 1st word
-    rule2 = 'object.nextWord1 == "' + object.nextWord1 + '"'
-    # 3. Next 2nd word
-    rule3 = 'object.nextWord2 == "' + object.nextWord2 + '"'
-    # 4. Previous 1st word
-    rule4 = 'object.prevWord1 == "' + object.prevWord1 + '"'
-    # 5. Previous 2nd word
-    rule5 = 'object.prevWord2 == "' + object.prevWord2 + '"'
-
-    rule6 = 'object.pos == "' + object.pos + '"'
-
-    rule7 = 'object.nextPos1 == "' + object.nextPos1 + '"'
-
-    rule8 = 'object.nextPos2 == "' + object.nextPos2 + '"'
-
-    rule9 = 'object.prevPos1 == "' + object.prevPos1 + '"'
-
-    rule10 = 'object.prevPos2 == "' + object.prevPos2 + '"'
+# Generate concrete rules based on input object of 5-word window context object,
+# a rule is a tuple of (slot, value id) conditions (see Rule.py), its conditions
+# cover one of the window spans of the rule templates (see RuleTemplates.py)
+def generateRules(objectStore, objectId, templates=FULL_RULE_TEMPLATES):
+    word_ids = objectStore.getIds(objectId, WINDOW_WORD_SLOTS)
+    pos_ids = objectStore.getIds(objectId, WINDOW_POS_SLOTS)
+    strings = objectStore.vocabulary.strings
+    object_word_list = [strings[id] for id in word_ids]
+    object_pos_list = [strings[id] for id in pos_ids]
 
     rules = []
-    wordrules = [rule5, rule4, rule1, rule2, rule3]
-    posrules = [rule10, rule9, rule6, rule7, rule8]
-    object_word_list = [
-        object.prevWord2,
-        object.prevWord1,
-        object.word,
-        object.nextWord1,
-        object.nextWord2,
-    ]
-
-    object_pos_list = [
-        object.prevPos2,
-        object.prevPos1,
-        object.pos,
-        object.nextPos1,
-        object.nextPos2,
-    ]
-
-    for i in range(0, 3):
-        if object_word_list[i] != "":
-            if object_word_list[4] != "":
-                rules.extend(
-                    make_rules(i, i, 5, "", wordrules, posrules, object_pos_list)
-                )
-            if object_word_list[3] != "":
-                rules.extend(
-                    make_rules(i, i, 4, "", wordrules, posrules, object_pos_list)
-                )
-            rules.extend(make_rules(i, i, 3, "", wordrules, posrules, object_pos_list))
+    wordrules = [((slot, id),) for slot, id in zip(WINDOW_WORD_SLOTS, word_ids)]
+    posrules = [((slot, id),) for slot, id in zip(WINDOW_POS_SLOTS, pos_ids)]
+
+    for start, end in templates.spans:
+        # The words at both ends of the span are in the sentence
+        if object_word_list[start] == "":
+            continue
+        if end > 3 and object_word_list[end - 1] == "":
+            continue
+        rules.extend(
+            make_rules(
+                start,
+                start,
+                end,
+                (),
+                wordrules,
+                posrules,
+                object_pos_list,
+                templates.usePOS,
+            )
+        )
 
     # rules_set_dtype = set(rules)
     rules_set_dtype = OrderedSet(rules)
     return rules_set_dtype
 
 
-def countMatching(objects, ruleNotIn):
-    counts: Dict[str, int] = {}  # counts = {}
-    matchedObjects: Dict[str, list] = {}  # matchedObjects = {}
-    for object in objects:
-        rules = generateRules(object)
-        for rule in rules:
-            if rule in ruleNotIn:
-                continue
-            counts[rule] = counts.setdefault(rule, 0) + 1
-            matchedObjects.setdefault(rule, []).append(object)
-    return counts, matchedObjects
-
+def getImprovementBackend(name):
+    """
+    Class scoring the layer-2 candidate rules of a target tag:
+    "heap": ImprovementQueue, lazy-greedy max-heap of the improvements
+    "bitset": CoverageMatrix, NumPy arrays of weighted match counts updated with
+    np.bincount, ties broken with a coverage bitset (needs NumPy)
+    Both learn the same tree in about the same time, "heap" has no dependency.
+    """
+    if name == "heap":
+        return ImprovementQueue
+    if name == "bitset":
+        from .CoverageMatrix import CoverageMatrix
 
-def satisfy(object, rule):
-    return eval(rule)
+        return CoverageMatrix
+    raise ValueError(f"Unknown improvement backend: {name}")
 
 
-def fire(rule, cornerstoneCases):
-    for object in cornerstoneCases:
-        if satisfy(object, rule):
-            return True
-    return False
+# Object store of a rule counting worker, sent once when the worker starts
+workerObjectStore: Optional[ObjectStore] = None
 
 
-def generateRulesFromObjectSet(objects):
-    res = []
-    for object in objects:
-        rules = generateRules(object)
-        res += rules
-    return res
+def warm_up_rule_counting(objectStore):
+    global workerObjectStore
+    workerObjectStore = objectStore
 
 
-class SCRDRTreeLearner(SCRDRTree):
-    def __init__(self, iThreshold=2, mThreshold=2):
-        self.improvedThreshold = iThreshold
-        self.matchedThreshold = mThreshold
+def generateShardRules(objectIds, templates):
+    return [
+        list(generateRules(workerObjectStore, objectId, templates))
+        for objectId in objectIds
+    ]
 
-    # For layer-2 exception structure
-    def findMostImprovingRuleForTag(
-        self, startTag, correctTag, correctCounts, wrongObjects
-    ):
-        impCounts, affectedObjects = countMatching(wrongObjects, [])
 
-        maxImp = -1000000
-        bestRule = ""
-        for rule in impCounts:
-            temp = impCounts[rule]
-            if rule in correctCounts:
-                temp -= correctCounts[rule]
+class RuleCandidateReport(NamedTuple):
+    """
+    Projection of the candidate rules of a training corpus, see
+    SCRDRTreeLearner.estimateRuleCandidates
+    objects: objects stored, occurrences: objects of the corpus they stand for,
+    candidates: distinct candidate rules, ruleOccurrences: rules of all the stored
+    objects (size of the rule index of the layer-2 learning), memory: approximate
+    bytes of the RuleCache holding them
+    """
 
-            if temp > maxImp:
-                maxImp = temp
-                bestRule = rule
+    objects: int
+    occurrences: int
+    candidates: int
+    ruleOccurrences: int
+    memory: int
 
-        if maxImp == -1000000:
-            affectedObjects[bestRule] = []
 
-        return bestRule, maxImp, affectedObjects[bestRule]
+class SCRDRTreeLearner(SCRDRTree):
+    """
+    Learns the SCRDR tree from the objects of an ObjectStore, the object sets and the
+    cornerstone cases of the nodes are lists of object ids. The candidate rules of
+    each object are generated once and counted by their ids in a RuleCache.
+    *Note: with workers > 1, the candidate rules of large object sets are generated
+    by shards in a pool of processes, the learned tree is the same.
+    With parallelSubtrees, the exception rules of each initialized tag are learned
+    in the pool instead, they only depend on the objects of the tag.
+    improvementBackend: scoring of the layer-2 candidate rules, see
+    getImprovementBackend.
+    With deduplicate, identical objects are stored once and weighted by their number
+    of occurrences, rules are counted with the weights so the tree is the same.
+    ruleTemplates: RuleTemplates, or the name of a set of RULE_TEMPLATE_SETS, of the
+    candidate rules. With a candidateBudget, learnRDRTree fails before learning if
+    the corpus has more candidate rules (see estimateRuleCandidates).
+    """
+
+    def __init__(
+        self,
+        iThreshold=2,
+        mThreshold=2,
+        workers=1,
+        parallelSubtrees=False,
+        improvementBackend="heap",
+        deduplicate=True,
+        ruleTemplates="full",
+        candidateBudget=None,
+    ):
+        self.improvedThreshold = iThreshold
+        self.matchedThreshold = mThreshold
+        self.workers = workers
+        self.parallelSubtrees = parallelSubtrees
+        # Fails early if the backend is unknown or NumPy is missing
+        getImprovementBackend(improvementBackend)
+        self.improvementBackend = improvementBackend
+        self.deduplicate = deduplicate
+        self.ruleTemplates = getRuleTemplates(ruleTemplates)
+        self.candidateBudget = candidateBudget
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.objectStore = ObjectStore()
+        self.ruleCache = RuleCache()
 
-    def findMostEfficientRule(self, startTag, objects, correctCounts):
+    # For layer-2 exception structure
+    def findMostEfficientRule(self, startTag, objects, ruleIndexes, improvementQueues):
+        # objects: object ids of every tag, in corpus order
+        # ruleIndexes: RuleIndex of every tag of objects
+        # improvementQueues: improvement backend of the tags already searched
         maxImp = -1000000
-        rule = ""
+        rule = None
         correctTag = ""
         cornerstoneCases = []
 
-        for tag in objects:
-            if tag == startTag:
+        # Branch and bound: the tags are searched by decreasing weight, a bound of the
+        # improvement of their rules, and skipped once their bound can not beat the
+        # best rule. Equal improvements still go to the first tag of objects.
+        positions = {tag: position for position, tag in enumerate(objects)}
+        bestPosition = len(positions)
+        tags = sorted(
+            (tag for tag in objects if tag != startTag),
+            key=lambda tag: -ruleIndexes[tag].total,
+        )
+        for tag in tags:
+            # Weight of the objects of the tag, the improvement can not exceed it
+            total = ruleIndexes[tag].total
+            if total < maxImp or total < self.improvedThreshold:
+                break
+            if total == maxImp and positions[tag] > bestPosition:
                 continue
-            if (
-                len(objects[tag]) <= maxImp
-                or len(objects[tag]) < self.improvedThreshold
-            ):
+
+            if tag not in improvementQueues:
+                improvementQueues[tag] = getImprovementBackend(self.improvementBackend)(
+                    ruleIndexes[tag], ruleIndexes[startTag]
+                )
+            bound = improvementQueues[tag].getUpperBound()
+            if bound < max(maxImp, self.improvedThreshold):
+                continue
+            if bound == maxImp and positions[tag] > bestPosition:
                 continue
 
-            ruleTemp, imp, affectedObjects = self.findMostImprovingRuleForTag(
-                startTag, correctTag, correctCounts, objects[tag]
-            )
-            if imp >= self.improvedThreshold and imp > maxImp:
+            ruleTemp, imp = improvementQueues[tag].getBestRule()
+            if ruleTemp is None or imp < self.improvedThreshold:
+                continue
+            if imp > maxImp or (imp == maxImp and positions[tag] < bestPosition):
                 maxImp = imp
                 rule = ruleTemp
                 correctTag = tag
-                cornerstoneCases = affectedObjects
+                bestPosition = positions[tag]
 
         needToCorrectObjects: Dict[str, list] = {}  # needToCorrectObjects = {}
         errorRaisingObjects = []
         if maxImp > -1000000:
+            cornerstoneCases = ruleIndexes[correctTag].getMatchingObjects(rule)
+            isSatisfied = compileRule(self.objectStore, self.ruleCache.getRule(rule))
             for tag in objects:
                 if tag != correctTag:
-                    for object in objects[tag]:
-                        if satisfy(object, rule):
-                            needToCorrectObjects.setdefault(tag, []).append(object)
+                    for objectId in objects[tag]:
+                        if isSatisfied(objectId):
+                            needToCorrectObjects.setdefault(tag, []).append(objectId)
                             if tag == startTag:
-                                errorRaisingObjects.append(object)
+                                errorRaisingObjects.append(objectId)
 
         return (
             rule,
@@ -237,7 +297,7 @@ class SCRDRTreeLearner(SCRDRTree):
 
     def findMostMatchingRule(self, matchingCounts):
         correctTag = ""
-        bestRule = ""
+        bestRule = None
         maxCount = -1000000
 
         for tag in matchingCounts:
@@ -252,82 +312,210 @@ class SCRDRTreeLearner(SCRDRTree):
 
         return bestRule, correctTag
 
-    def buildNodeForObjectSet(self, objects, root):
-        cornerstoneCaseRules = generateRulesFromObjectSet(root.cornerstoneCases)
-
-        matchingCounts = {}
-        matchingObjects = {}
-        for tag in objects:
-            matchingCounts[tag], matchingObjects[tag] = countMatching(
-                objects[tag], cornerstoneCaseRules
+    def getRuleIds(self, objectId):
+        ruleIds = self.ruleCache.get(objectId)
+        if ruleIds is None:
+            ruleIds = self.ruleCache.add(
+                objectId, generateRules(self.objectStore, objectId, self.ruleTemplates)
             )
+        return ruleIds
+
+    def cacheRules(self, objectIds):
+        # Generates the rules of the objects not cached yet in the pool of processes
+        objectIds = [
+            objectId for objectId in objectIds if objectId not in self.ruleCache
+        ]
+        if self.executor is None or len(objectIds) < 2 * RULE_COUNTING_SHARD_SIZE:
+            return
+
+        shards = [
+            objectIds[start : start + RULE_COUNTING_SHARD_SIZE]  # noqa
+            for start in range(0, len(objectIds), RULE_COUNTING_SHARD_SIZE)
+        ]
+        # Rules are interned in object set order, as if generated serially
+        for shard, shardRules in zip(
+            shards,
+            self.executor.map(generateShardRules, shards, repeat(self.ruleTemplates)),
+        ):
+            for objectId, rules in zip(shard, shardRules):
+                self.ruleCache.add(objectId, rules)
+
+    def indexObjects(self, objectIds, ruleNotIn=()):
+        # ruleNotIn: ids of the rules which are not candidates
+        self.cacheRules(objectIds)
+        return RuleIndex(
+            ((objectId, self.getRuleIds(objectId)) for objectId in objectIds),
+            ruleNotIn,
+            self.objectStore.weights,
+        )
 
-        total = 0
-        for tag in objects:
-            total += len(objects[tag])
+    def buildNodeForObjectSet(self, objects, root):
+        """
+        Builds the exception rules of root correcting the objects, and their own
+        exceptions, from a work stack of (objects, node) tasks instead of recursive calls
+        """
+        tasks = [(objects, root)]
+        while tasks:
+            objects, root = tasks.pop()
+            cornerstoneCaseRules = {
+                ruleId
+                for objectId in root.cornerstoneCases
+                for ruleId in self.getRuleIds(objectId)
+            }
+
+            ruleIndexes = {}
+            for tag in objects:
+                ruleIndexes[tag] = self.indexObjects(objects[tag], cornerstoneCaseRules)
+            matchingCounts = {tag: ruleIndexes[tag].counts for tag in objects}
 
-        currentNode = root
-        elseChild = False
-        while True:
-            rule, correctTag = self.findMostMatchingRule(matchingCounts)
+            currentNode = root
+            elseChild = False
+            exceptionTasks = []
+            while True:
+                rule, correctTag = self.findMostMatchingRule(matchingCounts)
 
-            if rule == "":
-                break
+                if rule is None:
+                    break
 
-            cornerstoneCases = matchingObjects[correctTag][rule]
+                cornerstoneCases = ruleIndexes[correctTag].postings[rule]
 
-            needToCorrectObjects = {}
-            for tag in objects:
-                if rule in matchingObjects[tag]:
-                    if tag != correctTag:
-                        needToCorrectObjects[tag] = matchingObjects[tag][rule]
-                    for object in matchingObjects[tag][rule]:
-                        rules = generateRules(object)
-                        for rule1 in rules:
-                            if rule1 not in matchingCounts[tag]:
-                                continue
-                            matchingCounts[tag][rule1] -= 1
+                needToCorrectObjects = {}
+                for tag in objects:
+                    matchedObjects = ruleIndexes[tag].postings.get(rule)
+                    if matchedObjects is not None:
+                        if tag != correctTag:
+                            needToCorrectObjects[tag] = matchedObjects
+                        ruleIndexes[tag].cover(matchedObjects)
 
-            node = Node(
-                rule,
-                'object.conclusion = "' + correctTag + '"',
-                currentNode,
-                None,
-                None,
-                cornerstoneCases,
-            )
+                node = Node(
+                    Condition(
+                        self.ruleCache.getRule(rule), self.objectStore.vocabulary
+                    ),
+                    correctTag,
+                    currentNode,
+                    None,
+                    None,
+                    cornerstoneCases,
+                )
 
-            if not elseChild:
-                currentNode.exceptChild = node
-                elseChild = True
-            else:
-                currentNode.elseChild = node
+                if not elseChild:
+                    currentNode.exceptChild = node
+                    elseChild = True
+                else:
+                    currentNode.elseChild = node
 
-            currentNode = node
-            self.buildNodeForObjectSet(needToCorrectObjects, currentNode)
+                currentNode = node
+                exceptionTasks.append((needToCorrectObjects, currentNode))
+
+            # Exceptions of the new nodes are built next, in the order of the nodes
+            tasks.extend(reversed(exceptionTasks))
 
     def learnRDRTree(
-        self, initializedCorpus, goldStandardCorpus, string_argument=False
+        self,
+        initializedCorpus,
+        goldStandardCorpus,
+        string_argument=False,
+        sentencesPOS=None,
+    ):
+        objects = self.buildObjects(
+            initializedCorpus, goldStandardCorpus, string_argument, sentencesPOS
+        )
+        vocabulary = self.objectStore.vocabulary
+        self.root = Node(Condition((), vocabulary), "NN", None, None, None, [], 0)
+
+        self.startWorkers()
+        try:
+            if self.candidateBudget is not None:
+                candidates = self.cacheAllRules(objects)
+                if candidates > self.candidateBudget:
+                    raise ValueError(
+                        f"{candidates} candidate rules exceed the budget of "
+                        f"{self.candidateBudget}, use smaller rule templates"
+                    )
+            self.learnExceptionRules(objects)
+        finally:
+            self.stopWorkers()
+
+    def estimateRuleCandidates(
+        self,
+        initializedCorpus,
+        goldStandardCorpus,
+        string_argument=False,
+        sentencesPOS=None,
     ):
-        self.root = Node("True", 'object.conclusion = "NN"', None, None, None, [], 0)
+        """
+        Dry run of learnRDRTree: generates the candidate rules of the objects of the
+        corpus with the rule templates, without learning the tree
+        Returns a RuleCandidateReport
+        """
+        objects = self.buildObjects(
+            initializedCorpus, goldStandardCorpus, string_argument, sentencesPOS
+        )
+        self.startWorkers()
+        try:
+            candidates = self.cacheAllRules(objects)
+        finally:
+            self.stopWorkers()
+
+        ruleCache = self.ruleCache
+        return RuleCandidateReport(
+            len(self.objectStore),
+            sum(self.objectStore.weights),
+            candidates,
+            sum(len(ruleIds) for ruleIds in ruleCache.objectRuleIds.values()),
+            ruleCache.getMemoryUsage(),
+        )
 
-        objects = getObjectDictionary(
-            initializedCorpus, goldStandardCorpus, string_argument
+    def buildObjects(
+        self, initializedCorpus, goldStandardCorpus, string_argument, sentencesPOS
+    ):
+        self.objectStore = ObjectStore()
+        self.ruleCache = RuleCache()
+        return getObjectDictionary(
+            initializedCorpus,
+            goldStandardCorpus,
+            string_argument,
+            sentencesPOS,
+            self.objectStore,
+            self.deduplicate,
         )
 
+    def cacheAllRules(self, objects):
+        # Generates the rules of every object and returns the number of distinct rules
+        objectIds = [
+            objectId
+            for objectSet in objects.values()
+            for tagObjects in objectSet.values()
+            for objectId in tagObjects
+        ]
+        self.cacheRules(objectIds)
+        for objectId in objectIds:
+            self.getRuleIds(objectId)
+        return len(self.ruleCache.rules)
+
+    def startWorkers(self):
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(
+                self.workers,
+                initializer=warm_up_rule_counting,
+                initargs=(self.objectStore,),
+            )
+
+    def stopWorkers(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def learnExceptionRules(self, objects):
+        # objects: object sets of the initialized tags, see getObjectDictionary
+        vocabulary = self.objectStore.vocabulary
+        initializedTagNodes = []
         currentNode = self.root
         for initializedTag in objects:
             # print("\n===> Building exception rules for tag %s" % initializedTag)
-            correctCounts: Dict[str, int] = {}  # correctCounts = {}
-
-            for object in objects[initializedTag][initializedTag]:
-                rules = generateRules(object)
-                for rule in rules:
-                    correctCounts[rule] = correctCounts.setdefault(rule, 0) + 1
-
             node = Node(
-                'object.tag == "' + initializedTag + '"',
-                'object.conclusion = "' + initializedTag + '"',
+                Condition(((TAG_SLOT, vocabulary.getId(initializedTag)),), vocabulary),
+                initializedTag,
                 self.root,
                 None,
                 None,
@@ -341,50 +529,172 @@ class SCRDRTreeLearner(SCRDRTree):
                 currentNode.elseChild = node
 
             currentNode = node
-            objectSet = objects[initializedTag]
+            initializedTagNodes.append(node)
+
+        if self.parallelSubtrees and self.executor is not None and len(objects) > 1:
+            # Subtrees are grafted in the order of the initialized tags
+            subtrees = self.executor.map(
+                learnSubtreeInWorker,
+                repeat(self.improvedThreshold),
+                repeat(self.matchedThreshold),
+                repeat(self.improvementBackend),
+                repeat(self.ruleTemplates),
+                objects.keys(),
+                objects.values(),
+            )
+            for node, subtree in zip(initializedTagNodes, subtrees):
+                graftSubtree(node, subtree, vocabulary)
+        else:
+            for node, initializedTag in zip(initializedTagNodes, objects):
+                self.learnSubtree(node, initializedTag, objects[initializedTag])
+
+    def learnSubtree(self, currentNode, initializedTag, objectSet):
+        """
+        Learns the layer-2 exception rules of the node of an initialized tag and their
+        own exceptions, objectSet: object sets of the initialized tag by correct tag
+        """
+        vocabulary = self.objectStore.vocabulary
+
+        # The counts of the index of initializedTag are the correct counts
+        ruleIndexes = {tag: self.indexObjects(objectSet[tag]) for tag in objectSet}
+        # The objects left for each tag are the keys of the objectRules of its index:
+        # removing an object is O(1) and the others keep their corpus order
+        objectSet = {tag: ruleIndexes[tag].objectRules for tag in ruleIndexes}
+        improvementQueues: Dict[str, ImprovementQueue] = {}
 
-            elseChild = False
-            currentNode1 = currentNode
-            while True:
-                (
-                    rule,
-                    correctTag,
-                    imp,
-                    cornerstoneCases,
-                    needToCorrectObjects,
-                    errorRaisingObjects,
-                ) = self.findMostEfficientRule(initializedTag, objectSet, correctCounts)
-                if imp < self.improvedThreshold:
-                    break
+        elseChild = False
+        currentNode1 = currentNode
+        while True:
+            (
+                rule,
+                correctTag,
+                imp,
+                cornerstoneCases,
+                needToCorrectObjects,
+                errorRaisingObjects,
+            ) = self.findMostEfficientRule(
+                initializedTag, objectSet, ruleIndexes, improvementQueues
+            )
+            if imp < self.improvedThreshold:
+                break
 
-                node = Node(
-                    rule,
-                    'object.conclusion = "' + correctTag + '"',
-                    currentNode,
-                    None,
-                    None,
-                    cornerstoneCases,
-                    2,
-                )
+            node = Node(
+                Condition(self.ruleCache.getRule(rule), vocabulary),
+                correctTag,
+                currentNode,
+                None,
+                None,
+                cornerstoneCases,
+                2,
+            )
 
-                if not elseChild:
-                    currentNode1.exceptChild = node
-                    elseChild = True
-                else:
-                    currentNode1.elseChild = node
+            if not elseChild:
+                currentNode1.exceptChild = node
+                elseChild = True
+            else:
+                currentNode1.elseChild = node
+
+            currentNode1 = node
+
+            # Removing wrongly tagged objects of initializedTag raises the
+            # improvement of their rules
+            correctRules = ruleIndexes[initializedTag].objectRules
+            raisedRules = dict.fromkeys(
+                rule
+                for objectId in errorRaisingObjects
+                for rule in correctRules[objectId]
+            )
 
-                currentNode1 = node
+            ruleIndexes[correctTag].remove(cornerstoneCases)
+            removedObjects = list(cornerstoneCases)
+            for tag in needToCorrectObjects:
+                ruleIndexes[tag].remove(needToCorrectObjects[tag])
+                removedObjects.extend(needToCorrectObjects[tag])
 
-                for object in cornerstoneCases:
-                    objectSet[correctTag].remove(object)
+            for improvementQueue in improvementQueues.values():
+                improvementQueue.update(raisedRules, removedObjects)
 
-                for tag in needToCorrectObjects:
-                    for object in needToCorrectObjects[tag]:
-                        objectSet[tag].remove(object)
+            self.buildNodeForObjectSet(needToCorrectObjects, currentNode1)
 
-                for object in errorRaisingObjects:
-                    rules = generateRules(object)
-                    for rule in rules:
-                        correctCounts[rule] -= 1
 
-                self.buildNodeForObjectSet(needToCorrectObjects, currentNode1)
+def learnSubtreeInWorker(
+    iThreshold, mThreshold, improvementBackend, ruleTemplates, initializedTag, objectSet
+):
+    learner = SCRDRTreeLearner(
+        iThreshold,
+        mThreshold,
+        improvementBackend=improvementBackend,
+        ruleTemplates=ruleTemplates,
+    )
+    learner.objectStore = workerObjectStore
+    vocabulary = workerObjectStore.vocabulary
+    node = Node(
+        Condition(((TAG_SLOT, vocabulary.getId(initializedTag)),), vocabulary),
+        initializedTag,
+        None,
+        None,
+        None,
+        [],
+        1,
+    )
+    learner.learnSubtree(node, initializedTag, objectSet)
+    return flattenSubtree(node)
+
+
+def flattenSubtree(root):
+    """
+    Nodes under root as (father index, index of the node they are the except or else
+    child of, is except child, rule, conclusion, cornerstone cases, depth) records,
+    root being index 0. The records are sent between processes without pickling the
+    long chains of nodes recursively.
+    """
+    indexes = {id(root): 0}
+    records = []
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        for child, isExceptChild in ((node.elseChild, False), (node.exceptChild, True)):
+            if child is None:
+                continue
+            indexes[id(child)] = len(records) + 1
+            records.append(
+                (
+                    indexes[id(child.father)],
+                    indexes[id(node)],
+                    isExceptChild,
+                    child.condition.rule,
+                    child.conclusion,
+                    child.cornerstoneCases,
+                    child.depth,
+                )
+            )
+            nodes.append(child)
+    return records
+
+
+def graftSubtree(root, records, vocabulary):
+    # records: see flattenSubtree, the fathers come before their children
+    nodes = [root]
+    for (
+        fatherIndex,
+        parentIndex,
+        isExceptChild,
+        rule,
+        conclusion,
+        cornerstoneCases,
+        depth,
+    ) in records:
+        node = Node(
+            Condition(rule, vocabulary),
+            conclusion,
+            nodes[fatherIndex],
+            None,
+            None,
+            cornerstoneCases,
+            depth,
+        )
+        if isExceptChild:
+            nodes[parentIndex].exceptChild = node
+        else:
+            nodes[parentIndex].elseChild = node
+        nodes.append(node)
@@ -1,8 +1,9 @@
+import json
 import re
-from pathlib import Path
 
-from botok import WordTokenizer
-from botok.config import Config
+from ...data_processor import split_text_at_shads
+from ...Utility.botok_session import get_botok_session
+from ...Utility.tokenization_cache import get_tokenization_cache
 
 
 def Get_CONTENT_POS_attributes(string_text):
@@ -14,6 +15,20 @@ def Get_CONTENT_POS_attributes(string_text):
     pattern = r"([^ ])-([^ ])"
     replacement = r"\1\2"
     string_text = re.sub(pattern, replacement, string_text)
+
+    cache = get_tokenization_cache()
+    if cache is None:
+        return Get_POS_list(string_text)
+
+    # Sentences are tokenized alone, only the ones not in the cache go to botok
+    pos_list = []
+    for sentence in split_text_at_shads([string_text], 1):
+        pos_list += json.loads(cache.get_or_tokenize("pos", sentence, Get_POS_json))
+    cache.commit()
+    return pos_list
+
+
+def Get_POS_list(string_text):
     tokens = Tokenize_words(string_text)
 
     pos_list = []
@@ -23,8 +38,12 @@ def Get_CONTENT_POS_attributes(string_text):
     return pos_list
 
 
+def Get_POS_json(string_text):
+    return json.dumps(Get_POS_list(string_text), ensure_ascii=False)
+
+
 def Tokenize_words(string_text):
-    config = Config(dialect_name="general", base_path=Path.home())
-    wt = WordTokenizer(config=config)
-    tokens = wt.tokenize(string_text, split_affixes=False, spaces_as_punct=False)
+    tokens = get_botok_session().tokenize(
+        string_text, split_affixes=False, spaces_as_punct=False
+    )
     return tokens
@@ -99,8 +99,10 @@ def ExtRDR_RUN(system_arguments):
             #     )
             # )
             THRESHOLD = args[3]
-            rdrTree = SCRDRTreeLearner(THRESHOLD[0], THRESHOLD[1])
-            rdrTree.learnRDRTree(args[2], args[1], True)
+            sentencesPOS = args[4] if len(args) > 4 else None
+            workers = args[5] if len(args) > 5 else 1
+            rdrTree = SCRDRTreeLearner(THRESHOLD[0], THRESHOLD[1], workers)
+            rdrTree.learnRDRTree(args[2], args[1], True, sentencesPOS)
             # print("\nWrite the learned tree model to file " + args[2] + ".RDR")
             # rdrTree.writeToFile(args[2] + ".RDR")
             # print("\nDone!")
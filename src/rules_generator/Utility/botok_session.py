@@ -0,0 +1,83 @@
+from pathlib import Path
+from typing import List, Optional
+
+from botok import WordTokenizer
+from botok.config import Config
+from botok.tokenizers.token import Token
+from botok.tries.trie import Trie
+
+DIALECT_NAME = "general"
+
+
+class BotokSession:
+    """
+    botok word tokenizer loaded once and shared by the tokenizer pipeline, the POS
+    lookups of the RDR learner and rdr_to_cql, instead of loading the dialect pack and
+    building the trie on every call.
+    Eg:
+        with BotokSession() as session:
+            tokens = session.tokenize("བཀྲ་ཤིས་བདེ་ལེགས།")
+    """
+
+    def __init__(self, dialect_name: str = DIALECT_NAME, base_path: Path = None):
+        self.dialect_name = dialect_name
+        self.base_path = base_path if base_path is not None else Path.home()
+        self.word_tokenizer: Optional[WordTokenizer] = None
+
+    @property
+    def is_started(self) -> bool:
+        return self.word_tokenizer is not None
+
+    def start(self) -> "BotokSession":
+        if self.word_tokenizer is None:
+            config = Config(dialect_name=self.dialect_name, base_path=self.base_path)
+            self.word_tokenizer = WordTokenizer(config=config)
+        return self
+
+    def close(self):
+        self.word_tokenizer = None
+
+    def get_word_tokenizer(self) -> WordTokenizer:
+        if self.word_tokenizer is None:
+            self.start()
+        return self.word_tokenizer
+
+    @property
+    def trie(self) -> Trie:
+        return self.get_word_tokenizer().tok.trie
+
+    def tokenize(
+        self, text: str, split_affixes: bool = True, spaces_as_punct: bool = False
+    ) -> List[Token]:
+        return self.get_word_tokenizer().tokenize(
+            text, split_affixes=split_affixes, spaces_as_punct=spaces_as_punct
+        )
+
+    def __enter__(self) -> "BotokSession":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+BOTOK_SESSION: Optional[BotokSession] = None
+
+
+def get_botok_session() -> BotokSession:
+    """
+    Returns the process wide botok session, the tokenizer is loaded on first use
+    """
+    global BOTOK_SESSION
+    if BOTOK_SESSION is None:
+        BOTOK_SESSION = BotokSession()
+    return BOTOK_SESSION.start()
+
+
+def close_botok_session():
+    """
+    Frees the process wide botok session, it is loaded again if used afterwards
+    """
+    global BOTOK_SESSION
+    if BOTOK_SESSION is not None:
+        BOTOK_SESSION.close()
+        BOTOK_SESSION = None
@@ -1,24 +1,31 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
 
-from botok import WordTokenizer
-from botok.config import Config
-from botok.textunits.bosyl import BoSyl
-from botok.tries.trie import Trie
-
+from .botok_session import get_botok_session
 from .get_syllables import get_syllables_without_tsek
+from .pos_lexicon import (
+    get_dialect_pack_fingerprint,
+    get_POS_lexicon,
+    write_POS_lexicon,
+)
 
 TSEK = "་"
 NO_POS = "NO_POS"
+# Number of words which POS and senses are kept in memory, rdr_to_cql looks up
+# the same words for many rules
+POS_CACHE_SIZE = 1 << 16
 
 
+@lru_cache(maxsize=POS_CACHE_SIZE)
 def get_word_senses(word_string):
-    config = Config(dialect_name="general", base_path=Path.home())
-    trie = Trie(
-        BoSyl,
-        profile=config.profile,
-        main_data=config.dictionary,
-        custom_data=config.adjustments,
-    )
+    lexicon = get_POS_lexicon()
+    if lexicon is not None:
+        lexicon_senses = lexicon.get_senses(word_string)
+        if lexicon_senses is not None:
+            return lexicon_senses
+
+    trie = get_botok_session().trie
     syls = get_syllables_without_tsek(word_string)
     current_node = None
     for i in range(len(syls)):
@@ -35,7 +42,14 @@ def get_word_senses(word_string):
     return []
 
 
+@lru_cache(maxsize=POS_CACHE_SIZE)
 def get_POS(word_string, is_first_iteration=True):
+    lexicon = get_POS_lexicon()
+    if lexicon is not None and is_first_iteration:
+        lexicon_POS = lexicon.get_POS(word_string)
+        if lexicon_POS is not None:
+            return lexicon_POS
+
     # First we try to find the POS from botok Word Tokenizer, (Tries to eliminate senses of lemma and returns it)
     POS_from_Word_Tokenizer = get_POS_through_Word_Tokenizer(
         word_string, is_first_iteration
@@ -45,43 +59,76 @@ def get_POS(word_string, is_first_iteration=True):
 
     # If we are not able to find POS from above method,
     # Then we select the sense with most freq,
-    config = Config(dialect_name="general", base_path=Path.home())
-    trie = Trie(
-        BoSyl,
-        profile=config.profile,
-        main_data=config.dictionary,
-        custom_data=config.adjustments,
-    )
-    syls = get_syllables_without_tsek(word_string)
-    current_node = None
-    for i in range(len(syls)):
-        syl = syls[i]
-        current_node = trie.walk(syl, current_node)
-
-    # Getting POS from all the data from current node
-    if (
-        current_node is not None
-        and "senses" in current_node.data
-        and current_node.data["senses"]
-    ):
-        max_freq = -1
-        word_pos = ""
-        for curr_node_sense in current_node.data["senses"]:
-            if curr_node_sense.get("freq", 0) == 0 and max_freq == -1:
-                max_freq = 1
-                word_pos = curr_node_sense["pos"]
-                continue
-            if curr_node_sense.get("freq", 0) == 0:
-                continue
-            if curr_node_sense["freq"] > max_freq:
-                max_freq = curr_node_sense["freq"]
-                word_pos = curr_node_sense["pos"]
-
-        return word_pos
+    word_senses = get_word_senses(word_string)
+    if word_senses:
+        return get_most_frequent_POS(word_senses)
 
     return NO_POS
 
 
+def get_most_frequent_POS(senses):
+    """
+    POS of the sense with the highest 'freq', the first one if there is a tie.
+    A sense without 'freq' is counted as freq 1, only if no sense was picked before it
+    """
+    max_freq = -1
+    word_pos = ""
+    for sense in senses:
+        if sense.get("freq", 0) == 0 and max_freq == -1:
+            max_freq = 1
+            word_pos = sense["pos"]
+            continue
+        if sense.get("freq", 0) == 0:
+            continue
+        if sense["freq"] > max_freq:
+            max_freq = sense["freq"]
+            word_pos = sense["pos"]
+    return word_pos
+
+
+def get_POS_cache_stats() -> Dict[str, int]:
+    POS_info, senses_info = get_POS.cache_info(), get_word_senses.cache_info()
+    return {
+        "hits": POS_info.hits + senses_info.hits,
+        "misses": POS_info.misses + senses_info.misses,
+        "size": POS_info.currsize + senses_info.currsize,
+    }
+
+
+def clear_POS_cache():
+    """
+    Forgets the POS and senses looked up, eg: after botok dictionary is changed
+    """
+    get_POS.cache_clear()
+    get_word_senses.cache_clear()
+
+
+def walk_trie_senses() -> Iterator[Tuple[List[str], List[dict]]]:
+    # (syllables, senses) of every node of botok trie with senses
+    nodes = [([], get_botok_session().trie.head)]
+    while nodes:
+        syls, node = nodes.pop()
+        if syls and node.data.get("senses"):
+            yield syls, node.data["senses"]
+        for syl, child_node in node.children.items():
+            nodes.append((syls + [syl], child_node))
+
+
+def build_POS_lexicon(path: Path):
+    """
+    Writes the POS and senses of all the words of botok dictionary to a POS lexicon
+    file (see open_POS_lexicon), built once for a botok version and dialect pack
+    """
+    session = get_botok_session()
+    fingerprint = get_dialect_pack_fingerprint(session.base_path / session.dialect_name)
+    entries = (
+        (TSEK.join(syls), get_POS(TSEK.join(syls) + TSEK), senses)
+        for syls, senses in walk_trie_senses()
+    )
+    write_POS_lexicon(path, fingerprint, entries)
+    clear_POS_cache()
+
+
 def remove_duplicates_list_of_dicts(list_of_dicts):
     seen_tuples = set()
     unique_list = []
@@ -96,9 +143,7 @@ def remove_duplicates_list_of_dicts(list_of_dicts):
 
 
 def get_POS_through_Word_Tokenizer(string, is_first_iteration=True):
-    config = Config(dialect_name="general", base_path=Path.home())
-    wt = WordTokenizer(config=config)
-    token_list = wt.tokenize(string, split_affixes=False)
+    token_list = get_botok_session().tokenize(string, split_affixes=False)
     # After the tokenizer, if this is still a word, we will try to get POS from this data
     if len(token_list) == 1:
         token = token_list[0]
@@ -124,19 +169,7 @@ def get_POS_through_Word_Tokenizer(string, is_first_iteration=True):
         ]
 
         # if there are still more senses left, one with most 'freq' (frequency) is returned
-        max_freq = -1
-        word_pos = ""
-        for curr_token_sense in filtered_token_senses:
-            if curr_token_sense.get("freq", 0) == 0 and max_freq == -1:
-                max_freq = 1
-                word_pos = curr_token_sense["pos"]
-                continue
-            if curr_token_sense.get("freq", 0) == 0:
-                continue
-            if curr_token_sense["freq"] > max_freq:
-                max_freq = curr_token_sense["freq"]
-                word_pos = curr_token_sense["pos"]
-        return word_pos
+        return get_most_frequent_POS(filtered_token_senses)
     return False
 
 
@@ -145,3 +178,4 @@ if __name__ == "__main__":
     word_pos = get_POS("ལས་")
     print(word_pos)
     print(get_word_senses("ལས་"))
+    print(get_POS_cache_stats())
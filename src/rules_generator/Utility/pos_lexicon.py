@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import botok
+from botok import TSEK
+
+from .botok_session import DIALECT_NAME
+from .get_syllables import get_syllables_without_tsek
+
+# Bytes of the lexicon file mapped in memory by sqlite instead of read in its page cache
+LEXICON_MMAP_SIZE = 1 << 28
+DIALECT_PACK_COMPONENTS = ["dictionary", "adjustments"]
+
+
+def get_dialect_pack_fingerprint(dialect_pack_path: Path) -> Optional[str]:
+    """
+    Hash of botok version and of the name, size and modification time of every file of
+    the dialect pack, None if the dialect pack is not downloaded yet
+    """
+    dialect_pack_path = Path(dialect_pack_path)
+    if not dialect_pack_path.is_dir():
+        return None
+
+    fingerprint = hashlib.sha256(botok.__version__.encode("utf-8"))
+    for component in DIALECT_PACK_COMPONENTS:
+        for tsv_path in sorted((dialect_pack_path / component).rglob("*.tsv")):
+            stat = tsv_path.stat()
+            file_key = f"{tsv_path.relative_to(dialect_pack_path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n"
+            fingerprint.update(file_key.encode("utf-8"))
+    return fingerprint.hexdigest()
+
+
+def get_lexicon_key(word_string: str) -> str:
+    # Syllables of the word as walked in botok trie, eg: 'བཀྲ་ཤིས་' -> 'བཀྲ་ཤིས'
+    return TSEK.join(get_syllables_without_tsek(word_string))
+
+
+def write_POS_lexicon(
+    path: Path,
+    fingerprint: str,
+    entries: Iterable[Tuple[str, str, List[dict]]],
+):
+    """
+    input: entries (lexicon key, POS of the word ending with a tsek, senses)
+    output: sqlite file replacing the one at path once it is complete
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    connection = sqlite3.connect(str(tmp_path))
+    connection.execute("CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT)")
+    connection.execute(
+        "CREATE TABLE lexicon (word TEXT PRIMARY KEY, pos TEXT, senses TEXT) WITHOUT ROWID"
+    )
+    connection.execute("INSERT INTO metadata VALUES ('fingerprint', ?)", (fingerprint,))
+    connection.executemany(
+        "INSERT OR REPLACE INTO lexicon VALUES (?, ?, ?)",
+        (
+            (key, pos, json.dumps(senses, ensure_ascii=False))
+            for key, pos, senses in entries
+        ),
+    )
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+    os.replace(tmp_path, path)
+
+
+class POSLexicon:
+    """
+    Read only word -> (POS, senses) snapshot of botok dictionary written by
+    get_POS.build_POS_lexicon, so get_POS and get_word_senses do not build botok trie.
+    The file is opened on the first lookup, and ignored if it was built from another
+    botok version or dialect pack than the one botok would load.
+    Eg:
+        with POSLexicon(Path("pos_lexicon.sqlite")) as lexicon:
+            senses = lexicon.get_senses("ལས་")
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        dialect_name: str = DIALECT_NAME,
+        base_path: Path = None,
+    ):
+        self.path = Path(path)
+        base_path = base_path if base_path is not None else Path.home()
+        self.dialect_pack_path = base_path / dialect_name
+        self.connection: Optional[sqlite3.Connection] = None
+        self.connection_pid: Optional[int] = None
+        self.is_stale = False
+
+    def connect(self) -> Optional[sqlite3.Connection]:
+        # Forked processes open their own connection to the file
+        if self.connection is not None and self.connection_pid == os.getpid():
+            return self.connection
+        if self.is_stale or not self.path.is_file():
+            return None
+
+        connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        connection.execute(f"PRAGMA mmap_size = {LEXICON_MMAP_SIZE}")
+        row = connection.execute(
+            "SELECT value FROM metadata WHERE key = 'fingerprint'"
+        ).fetchone()
+        fingerprint = get_dialect_pack_fingerprint(self.dialect_pack_path)
+        if row is None or fingerprint is None or row[0] != fingerprint:
+            connection.close()
+            self.is_stale = True
+            print(
+                f"[INFO] POS lexicon {self.path} was built for another botok dialect pack, botok is used instead"
+            )
+            return None
+
+        self.connection = connection
+        self.connection_pid = os.getpid()
+        return connection
+
+    def get_row(self, word_string: str) -> Optional[Tuple[Optional[str], str]]:
+        connection = self.connect()
+        if connection is None:
+            return None
+        return connection.execute(
+            "SELECT pos, senses FROM lexicon WHERE word = ?",
+            (get_lexicon_key(word_string),),
+        ).fetchone()
+
+    def get_POS(self, word_string: str) -> Optional[str]:
+        """
+        POS of a word ending with a tsek, None if the word is not in the lexicon
+        """
+        if not word_string.endswith(TSEK):
+            return None
+        row = self.get_row(word_string)
+        if row is None or get_lexicon_key(word_string) + TSEK != word_string:
+            return None
+        return row[0]
+
+    def get_senses(self, word_string: str) -> Optional[List[dict]]:
+        """
+        Senses of a word, None if the word is not in the lexicon or the lexicon can not
+        be used. botok trie also finds senses for words without a key in the lexicon
+        (eg: the last word of a compound), so they are looked up in botok.
+        """
+        row = self.get_row(word_string)
+        return json.loads(row[1]) if row is not None else None
+
+    def close(self):
+        if self.connection is not None and self.connection_pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+        self.connection_pid = None
+
+    def __enter__(self) -> "POSLexicon":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+POS_LEXICON: Optional[POSLexicon] = None
+
+
+def open_POS_lexicon(path: Path) -> POSLexicon:
+    """
+    Makes get_POS and get_word_senses look up words in the lexicon at path before botok,
+    the file is only read when a word is looked up
+    """
+    global POS_LEXICON
+    close_POS_lexicon()
+    POS_LEXICON = POSLexicon(path)
+    return POS_LEXICON
+
+
+def clear_memoized_lookups():
+    # Lookups memoized from the previous source of POS would be returned again
+    from .get_POS import clear_POS_cache
+
+    clear_POS_cache()
+
+
+def get_POS_lexicon() -> Optional[POSLexicon]:
+    return POS_LEXICON
+
+
+def close_POS_lexicon():
+    global POS_LEXICON
+    if POS_LEXICON is not None:
+        POS_LEXICON.close()
+        POS_LEXICON = None
+    clear_memoized_lookups()
@@ -1,5 +1,6 @@
 import re
-from typing import Dict
+from functools import partial
+from typing import Callable, Dict, List
 
 
 def replace_with_regex(patterns_replacements: Dict, text: str) -> str:
@@ -8,6 +9,45 @@ def replace_with_regex(patterns_replacements: Dict, text: str) -> str:
     return text
 
 
+class PreprocessingPlan:
+    """
+    Preprocessing steps compiled once and applied in order on a text.
+    Eg:
+        plan = PreprocessingPlan().add_replacements({"༌": "་", "+": ""})
+        plan.add_patterns({r"  +": " "})
+        cleaned_text = plan("ཤེས་རབ་+པོ  ཞིང༌")
+    """
+
+    def __init__(self):
+        self.steps: List[Callable[[str], str]] = []
+
+    def add_replacements(self, replacements: Dict) -> "PreprocessingPlan":
+        # Plain substrings are replaced without regex, str.replace is also several times
+        # faster than a single str.translate pass on tibetan text
+        self.steps.append(partial(replace_substrings, replacements=replacements))
+        return self
+
+    def add_patterns(self, patterns_replacements: Dict) -> "PreprocessingPlan":
+        for pattern, replace in patterns_replacements.items():
+            self.steps.append(partial(re.compile(pattern).sub, replace))
+        return self
+
+    def add_step(self, step: Callable[[str], str]) -> "PreprocessingPlan":
+        self.steps.append(step)
+        return self
+
+    def __call__(self, text: str) -> str:
+        for step in self.steps:
+            text = step(text)
+        return text
+
+
+def replace_substrings(text: str, replacements: Dict) -> str:
+    for substring, replace in replacements.items():
+        text = text.replace(substring, replace)
+    return text
+
+
 if __name__ == "__main__":
     tibetan_text = "བདེ་ལེགས་ཞུ་ཞུ་ཞུ་་་ཞུ"
     patterns_replacements = {
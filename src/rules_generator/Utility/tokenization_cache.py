@@ -0,0 +1,199 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import botok
+
+from .botok_session import DIALECT_NAME
+from .pos_lexicon import get_dialect_pack_fingerprint
+
+DEFAULT_MAX_CACHE_SIZE = 1 << 30  # bytes of cached values
+
+
+class TokenizationCache:
+    """
+    sqlite cache of botok results, one entry per sentence.
+    Entries are keyed by the hash of the kind of result (eg: 'words', 'pos'), botok version,
+    dialect, fingerprint of the dialect pack files (see get_dialect_pack_fingerprint) and
+    the text given to botok, so changing one of them never returns a stale result.
+    When the cached values grow over max_size bytes, the least recently used entries are evicted.
+    Several processes can share the file: entries are ordered by the time they were last used
+    and the size of the file is read when evicting, not counted by each process.
+    Eg:
+        with TokenizationCache(Path("botok_cache.sqlite")) as cache:
+            tokenized = cache.get_or_tokenize("words", text, tokenize)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_size: int = DEFAULT_MAX_CACHE_SIZE,
+        dialect_name: str = DIALECT_NAME,
+        base_path: Path = None,
+    ):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.dialect_name = dialect_name
+        base_path = base_path if base_path is not None else Path.home()
+        self.dialect_pack_path = base_path / dialect_name
+        self.dialect_pack_fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Tagger workers share the cache file, a writer waits for the others
+        self.connection = sqlite3.connect(str(self.path), timeout=60)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tokenization ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS tokenization_last_used ON tokenization (last_used)"
+        )
+        self.size = self.read_size()
+        self.last_used = 0
+
+    def read_size(self) -> int:
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM tokenization"
+        ).fetchone()[0]
+
+    def get_timestamp(self) -> int:
+        # Wall clock time shared by the processes, increasing within one process
+        self.last_used = max(time.time_ns(), self.last_used + 1)
+        return self.last_used
+
+    def get_dialect_pack_fingerprint(self) -> str:
+        # botok downloads the dialect pack on first use, until then it has no fingerprint
+        if self.dialect_pack_fingerprint is None:
+            self.dialect_pack_fingerprint = get_dialect_pack_fingerprint(
+                self.dialect_pack_path
+            )
+        return self.dialect_pack_fingerprint or ""
+
+    def get_key(self, kind: str, text: str) -> str:
+        key_text = "\0".join(
+            [
+                botok.__version__,
+                self.dialect_name,
+                self.get_dialect_pack_fingerprint(),
+                kind,
+                text,
+            ]
+        )
+        return hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+
+    def get(self, kind: str, text: str) -> Optional[str]:
+        key = self.get_key(kind, text)
+        row = self.connection.execute(
+            "SELECT value FROM tokenization WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE tokenization SET last_used = ? WHERE key = ?",
+            (self.get_timestamp(), key),
+        )
+        return row[0]
+
+    def set(self, kind: str, text: str, value: str):
+        key = self.get_key(kind, text)
+        size = len(value.encode("utf-8"))
+
+        previous_row = self.connection.execute(
+            "SELECT size FROM tokenization WHERE key = ?", (key,)
+        ).fetchone()
+        if previous_row is not None:
+            self.size -= previous_row[0]
+        self.connection.execute(
+            "INSERT OR REPLACE INTO tokenization VALUES (?, ?, ?, ?)",
+            (key, value, size, self.get_timestamp()),
+        )
+        self.size += size
+
+    def get_or_tokenize(
+        self, kind: str, text: str, tokenize: Callable[[str], str]
+    ) -> str:
+        value = self.get(kind, text)
+        if value is None:
+            value = tokenize(text)
+            self.set(kind, text, value)
+        return value
+
+    def evict(self):
+        # The size is read in the write transaction deleting the entries, so the entries
+        # written by the other processes are counted
+        if not self.connection.in_transaction:
+            return
+        self.size = self.read_size()
+        if self.size <= self.max_size:
+            return
+
+        rows = self.connection.execute(
+            "SELECT key, size FROM tokenization ORDER BY last_used"
+        )
+        evicted_keys = []
+        for key, size in rows:
+            if self.size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            self.size -= size
+        self.connection.executemany(
+            "DELETE FROM tokenization WHERE key = ?", evicted_keys
+        )
+        self.evictions += len(evicted_keys)
+
+    def commit(self):
+        self.evict()
+        self.connection.commit()
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self.size,
+        }
+
+    def __enter__(self) -> "TokenizationCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+TOKENIZATION_CACHE: Optional[TokenizationCache] = None
+
+
+def open_tokenization_cache(
+    path: Path, max_size: int = DEFAULT_MAX_CACHE_SIZE
+) -> TokenizationCache:
+    """
+    Opens the cache used by botok_word_tokenizer_pipeline and Get_CONTENT_POS_attributes,
+    without an opened cache botok is run on the whole text every time
+    """
+    global TOKENIZATION_CACHE
+    close_tokenization_cache()
+    TOKENIZATION_CACHE = TokenizationCache(path, max_size)
+    return TOKENIZATION_CACHE
+
+
+def get_tokenization_cache() -> Optional[TokenizationCache]:
+    return TOKENIZATION_CACHE
+
+
+def close_tokenization_cache():
+    global TOKENIZATION_CACHE
+    if TOKENIZATION_CACHE is not None:
+        TOKENIZATION_CACHE.close()
+        TOKENIZATION_CACHE = None
@@ -0,0 +1,118 @@
+from typing import List, NamedTuple, Tuple
+
+from botok import TSEK
+
+
+def count_syllables(word: str) -> int:
+    """
+    Number of syllables a word contributes to `split_words_into_syllables`
+    Eg: 'བྱ་བ་' -> 2, 'ཕྲེང་་་བ' -> 2, '།_' -> 1
+    """
+    return sum(1 for syl in word.split(TSEK) if syl)
+
+
+def filter_alignment_characters(word: str) -> str:
+    # '-' (affix) and '_' (shad spacing) are ignored when two windows are compared
+    return word.replace("-", "").replace("_", "")
+
+
+def find_window_end(
+    tokenized_words: List[str],
+    gold_corpus_words: List[str],
+    tok_idx: int,
+    gold_idx: int,
+) -> Tuple[int, int]:
+    """
+    Grows the unmatched windows tokenized_words[tok_idx:] and gold_corpus_words[gold_idx:]
+    until both windows end with the same word and have the same text (ignoring '-' and '_').
+    Returns the indices of the matching words closing the windows.
+
+    The syllable count and the text of both windows are accumulated as the windows grow,
+    so each word is visited once and a window is never joined or split again.
+    """
+    gold_last_idx, tok_last_idx = gold_idx, tok_idx
+
+    # Cumulative offsets of the words already added to the windows
+    tok_syls_count, gold_syls_count = 0, 0
+    tok_chars_count, gold_chars_count = 0, 0
+    tok_window: List[str] = []
+    gold_window: List[str] = []
+
+    # Windows are only extended at the end, so once two windows of the same length
+    # have a different text, they can not be identical anymore
+    is_window_diverged = False
+
+    while tok_last_idx < len(tokenized_words) and gold_last_idx < len(
+        gold_corpus_words
+    ):
+        if len(tok_window) == tok_last_idx - tok_idx:
+            tok_word = tokenized_words[tok_last_idx]
+            tok_window.append(filter_alignment_characters(tok_word))
+            tok_chars_count += len(tok_window[-1])
+            tok_syls_count += count_syllables(tok_word)
+
+        if len(gold_window) == gold_last_idx - gold_idx:
+            gold_word = gold_corpus_words[gold_last_idx]
+            gold_window.append(filter_alignment_characters(gold_word))
+            gold_chars_count += len(gold_window[-1])
+            gold_syls_count += count_syllables(gold_word)
+
+        if (
+            not is_window_diverged
+            and tok_chars_count == gold_chars_count
+            and tokenized_words[tok_last_idx].replace("_", "")
+            == gold_corpus_words[gold_last_idx].replace("_", "")
+        ):
+            if "".join(tok_window) == "".join(gold_window):
+                break
+            is_window_diverged = True
+
+        if tok_syls_count > gold_syls_count:
+            gold_last_idx += 1
+        elif tok_syls_count < gold_syls_count:
+            tok_last_idx += 1
+        else:
+            gold_last_idx += 1
+            tok_last_idx += 1
+
+    return gold_last_idx, tok_last_idx
+
+
+class QuarantinedRegion(NamedTuple):
+    """
+    Part of the gold corpus skipped by the tagger because botok output differs from it.
+    start and end are character offsets in the gold corpus given to the tagger,
+    syllable_idx is the first syllable of the region which differs in botok output.
+    """
+
+    start: int
+    end: int
+    syllable_idx: int
+    gold_syllable: str
+    tokenized_syllable: str
+
+
+def get_syllable_stream(text: str) -> List[str]:
+    """
+    Syllables of a gold corpus or tokenized text, ignoring word boundaries
+    Eg: 'ཡོད །_ དགེ-འོ་' -> ['ཡོད', '།', 'དགེའོ']
+    """
+    syllables = []
+    for word in filter_alignment_characters(text).split():
+        syllables += [syl for syl in word.split(TSEK) if syl]
+    return syllables
+
+
+def find_first_divergent_syllable(
+    gold_syllables: List[str], tokenized_syllables: List[str]
+) -> int:
+    """
+    Returns the index of the first syllable which differs in the two streams,
+    or the length of the shortest stream if one is the start of the other.
+    """
+    for syl_idx, (gold_syl, tok_syl) in enumerate(
+        zip(gold_syllables, tokenized_syllables)
+    ):
+        if gold_syl != tok_syl:
+            return syl_idx
+    return min(len(gold_syllables), len(tokenized_syllables))
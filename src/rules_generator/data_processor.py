@@ -1,33 +1,41 @@
 import re
+from functools import partial
 from pathlib import Path
+from typing import IO, Iterable, Iterator, Tuple, Union
 
 from botok import TSEK
 
-from rules_generator.Utility.regex_replacer import replace_with_regex
+from rules_generator.Utility.regex_replacer import PreprocessingPlan
+
+# There are two different kind of TSEK in tibetan, and here standard TSEK is used
+# In gold corpus, i)'-' for affix ii)'+' joiner iii)'?' when annotator is not sure
+# Eg: དགེ-འོ་, ཤེས་རབ་+པོ, རཏྣ་ མཱ་? ལཱི།?
+GOLD_CORPUS_CHARACTERS = {"?": " ", "+": "", "༌": TSEK}
+TOKENIZER_CHARACTERS = {**GOLD_CORPUS_CHARACTERS, "-": ""}
+
+# Single spaces are left as they are, only runs of spaces are replaced
+EXTRA_SPACES_PATTERN = re.compile(r"  +")
+NON_AFFIX_SPACE_PATTERN = re.compile(
+    r"([^་།_]) ([^ར ས འི འམ འང འོ འིའོ འིའམ འིའང འོའམ འོའང ། _])"
+)
+AFFIX_SPACE_PATTERN = re.compile(
+    r"((?![་།_༠༡༢༣༤༥༦༧༨༩])[\u0F00-\u0FFF]) (ར|ས|འི|འམ|འང|འོ|འིའོ|འིའམ|འིའང|འོའམ|འོའང)"
+)
+SHAD_RUN_PATTERN = re.compile(r"[།_]+")
+# Spaces between the digits are in the number, eg: གཏམ་༡ ༢ ༣བྱ་བ་ -> གཏམ་ ༡༢༣ བྱ་བ་
+TIBETAN_NUMBER_PATTERN = re.compile(r"[༠༡༢༣༤༥༦༧༨༩]+(?:[ ]+[༠༡༢༣༤༥༦༧༨༩]+)*")
+NON_TIBETAN_SPACE_PATTERN = re.compile(r"([^\u0F00-\u0FFF\s]) (?=[^\u0F00-\u0FFF\s])")
+NON_TIBETAN_CHARACTER_PATTERN = re.compile(r"[^\u0F00-\u0FFF\s_-]+")
 
 
 def filter_text(text: str, is_gold_corpus=False) -> str:
-    # There are two different kind of TSEK in tibetan, and here standard TSEK is used
-    # In gold corpus, i)'-' for affix ii)'+' joiner iii)'?' when annotator is not sure
-    # Eg: དགེ-འོ་, ཤེས་རབ་+པོ, རཏྣ་ མཱ་? ལཱི།?
-    special_characters = {"?": " ", "+": "", "-": "", "༌": TSEK}
     if is_gold_corpus:
-        special_characters = {"?": " ", "+": "", "༌": TSEK}
-
-    text = re.sub(
-        "|".join(re.escape(key) for key in special_characters.keys()),
-        lambda match: special_characters[match.group(0)],
-        text,
-    )
-    text = remove_extra_spaces(text)
-    return text
+        return GOLD_CORPUS_FILTER(text)
+    return TOKENIZER_FILTER(text)
 
 
 def remove_extra_spaces(text: str) -> str:
-    pattern = r"[ ]+"
-    replacement = " "
-    text = replace_with_regex({pattern: replacement}, text.strip())
-    return text
+    return EXTRA_SPACES_PATTERN.sub(" ", text.strip())
 
 
 def adjust_spaces_for_non_affix(text: str) -> str:
@@ -37,10 +45,7 @@ def adjust_spaces_for_non_affix(text: str) -> str:
     Expected: དགེ འོ་ བཀྲ་ཤིས་ ཤོག།
     *Note that in དགེ འོ་, space before འོ་ is not closed,because this is an affix
     """
-    pattern = r"([^་།_]) ([^ར ས འི འམ འང འོ འིའོ འིའམ འིའང འོའམ འོའང ། _])"
-    replacement = r"\1\2"
-    text = replace_with_regex({pattern: replacement}, text)
-    return text
+    return NON_AFFIX_SPACE_PATTERN.sub(r"\1\2", text)
 
 
 def adjust_spaces_for_affix(text: str) -> str:
@@ -49,29 +54,85 @@ def adjust_spaces_for_affix(text: str) -> str:
     String: །འཁོར་བ འི་ འབྲོག་ ནི་ མི་ བཟད་པ-འི།
     Expected string: །འཁོར་བ-འི་ འབྲོག་ ནི་ མི་ བཟད་པ-འི།
     """
-    pattern = r"((?![་།_༠༡༢༣༤༥༦༧༨༩])[\u0F00-\u0FFF]) (ར|ས|འི|འམ|འང|འོ|འིའོ|འིའམ|འིའང|འོའམ|འོའང)"
-    replacement = r"\1-\2"
-    text = replace_with_regex({pattern: replacement}, text)
+    return AFFIX_SPACE_PATTERN.sub(r"\1-\2", text)
+
+
+def adjust_spaces_for_shads(text: str) -> str:
+    # སྐད་དུ།_རཱ་ -> སྐད་དུ །_ རཱ་, but ༄༅།_།_ཀ -> ༄༅།_།_ ཀ and ཀ།_༄ -> ཀ །_༄
+    return SHAD_RUN_PATTERN.sub(format_shad_run, text)
+
 
-    return text
+def format_shad_run(match: re.Match) -> str:
+    text, start, end = match.string, match.start(), match.end()
+    space_before = "" if start > 0 and text[start - 1] == "༅" else " "
+    space_after = "" if end < len(text) and text[end] == "༄" else " "
+    return space_before + match.group() + space_after
 
 
 def adjust_spaces_for_tibetan_numbers(text: str) -> str:
-    patterns = {
-        r"(?<=[༠༡༢༣༤༥༦༧༨༩])([ ]+)(?=[༠༡༢༣༤༥༦༧༨༩])": r"",  # གཏམ་༡ ༢  ༣བྱ་བ་ -> གཏམ་༡༢༣བྱ་བ་
-        r"\s*([༠༡༢༣༤༥༦༧༨༩]+)\s*": r" \1 ",  # གཏམ་༡༢༣བྱ་བ་ -> གཏམ་ ༡༢༣ བྱ་བ་,
-    }
-    text = replace_with_regex(patterns, text)
-    return text
+    # གཏམ་༡ ༢  ༣བྱ་བ་ -> གཏམ་ ༡༢༣ བྱ་བ་
+    return surround_with_spaces(TIBETAN_NUMBER_PATTERN, text, remove_spaces=True)
 
 
 def adjust_spaces_for_non_tibetan_character(text: str) -> str:
-    patterns = {
-        r"(?<=[^\u0F00-\u0FFF\s]) (?=[^\u0F00-\u0FFF\s])": r"",  # For non tibetan characters
-        r"\s*([^\u0F00-\u0FFF\s_-]+)\s*": r" \1 ",
-    }
-    text = replace_with_regex(patterns, text)
-    return text
+    # ཀ་ a b  c ཁ -> ཀ་ abc ཁ
+    text = NON_TIBETAN_SPACE_PATTERN.sub(r"\1", text)
+    return surround_with_spaces(NON_TIBETAN_CHARACTER_PATTERN, text)
+
+
+def surround_with_spaces(
+    pattern: re.Pattern, text: str, remove_spaces: bool = False
+) -> str:
+    r"""
+    Same as re.sub(r"\s*(pattern)\s*", r" \1 ", text), a pattern starting with \s*
+    is tried at every character of the text, so the whitespaces around the matches are
+    stripped from the text between them instead
+    """
+    pieces = []
+    piece_start = 0
+    for match in pattern.finditer(text):
+        piece = text[piece_start : match.start()]  # noqa: E203
+        pieces.append(piece.lstrip() if piece_start else piece)
+        pieces[-1] = pieces[-1].rstrip()
+        matched = match.group().replace(" ", "") if remove_spaces else match.group()
+        pieces.append(" " + matched + " ")
+        piece_start = match.end()
+
+    piece = text[piece_start:]
+    pieces.append(piece.lstrip() if piece_start else piece)
+    return "".join(pieces)
+
+
+GOLD_CORPUS_FILTER = (
+    PreprocessingPlan()
+    .add_replacements(GOLD_CORPUS_CHARACTERS)
+    .add_step(remove_extra_spaces)
+)
+TOKENIZER_FILTER = (
+    PreprocessingPlan()
+    .add_replacements(TOKENIZER_CHARACTERS)
+    .add_step(remove_extra_spaces)
+)
+
+# Joining all the words, not leaving spaces unless its for SHAD
+TOKENIZER_PLAN = (
+    PreprocessingPlan()
+    .add_step(TOKENIZER_FILTER)
+    .add_patterns({r"(?<=[^།]) (?=[^།])": ""})
+)
+
+TAGGING_PLAN = (
+    PreprocessingPlan()
+    .add_step(GOLD_CORPUS_FILTER)
+    # Spaces are single after the filter, so a space next to a shad is the shad spacing
+    # ༄༅༅། ། ། །རྒྱ་གར་ སྐད་དུ།  ༄ -> ༄༅༅།_།_།_།རྒྱ་གར་ སྐད་དུ།_༄, ཞིང༌ ། ། -> ཞིང་_།_།
+    .add_replacements({"། ": "།_", " །": "_།"})
+    .add_step(adjust_spaces_for_shads)
+    .add_step(adjust_spaces_for_non_affix)
+    .add_step(adjust_spaces_for_tibetan_numbers)
+    .add_step(adjust_spaces_for_non_tibetan_character)
+    .add_step(adjust_spaces_for_affix)
+)
 
 
 def prepare_gold_corpus_for_tokenizer(gold_corpus: str) -> str:
@@ -80,14 +141,7 @@ def prepare_gold_corpus_for_tokenizer(gold_corpus: str) -> str:
     input: string of a file before going under max match(botok)
     output/return: cleaned/preprocess string
     """
-
-    text = filter_text(gold_corpus)
-
-    # Joining all the words, not leaving spaces unless its for SHAD
-    patterns = {r"(?<=([^།])) (?=([^།]))": ""}
-
-    text = replace_with_regex(patterns, text)
-    return text
+    return TOKENIZER_PLAN(gold_corpus)
 
 
 def transform_gold_corpus_for_tagging(gold_corpus: str) -> str:
@@ -96,24 +150,119 @@ def transform_gold_corpus_for_tagging(gold_corpus: str) -> str:
     input: string where words are separated with space by human annotators before going to tagger
     output/return: cleaned/preprocess string where words are still separated by space
     """
-    text = filter_text(gold_corpus, is_gold_corpus=True)
-
-    patterns = {
-        "།[ ]+༄": "།_༄",  # ཕྲེང་བ།  ༄༅༅།-> ཕྲེང་བ།_༄༅༅།
-        "༅[ ]+།": "༅_།",
-        "(?<=།) (?=།)": "_",  # ༄༅༅། ། ། །རྒྱ་གར་ སྐད་དུ། -> ༄༅༅།_།_།_།རྒྱ་གར་ སྐད་དུ།
-        "[ ]+།": "_།",  # རྣམ་གྲོལ་ ཞིང༌ ། ། ->རྣམ་གྲོལ་ ཞིང་ _།_།,
-        "།[ ]+": "།_",
-        r"(?<![༅།_])([།_]+)": r" \1",  # སྐད་དུ།_རཱ་ -> སྐད་དུ །_རཱ་
-        r"([།_]+)(?![༄།_])": r"\1 ",  # སྐད་དུ།_རཱ་ -> སྐད་དུ།_ རཱ་
-    }
-    text = replace_with_regex(patterns, text)
-    text = adjust_spaces_for_non_affix(text)
-    text = adjust_spaces_for_tibetan_numbers(text)
-    text = adjust_spaces_for_non_tibetan_character(text)
-    text = adjust_spaces_for_affix(text)
-
-    return text
+    return TAGGING_PLAN(gold_corpus)
+
+
+# Shad followed by spaces (if any) and a consonant, eg: 'ཡོད། དཔལ། །ཤོག' splits into
+# 'ཡོད། ', 'དཔལ། །' and 'ཤོག', the rest of the text is preprocessed and tokenized the same
+SAFE_SHAD_BOUNDARY = re.compile(r"།[ ]*(?=[\u0F40-\u0F6C])")
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def split_text_at_shads(
+    texts: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    input: pieces of a gold corpus (lines of a file, blocks read from a file)
+    output/return: chunks of at least chunk_size characters (except the last one),
+    each non final chunk ends with a shad and the spaces following it (if any)
+    *Note: joining the chunks gives back the joined pieces
+    """
+    buffer = ""
+    search_start = chunk_size - 1
+
+    for text in texts:
+        buffer += text
+
+        while len(buffer) >= chunk_size:
+            boundary = SAFE_SHAD_BOUNDARY.search(buffer, search_start)
+            if boundary is None:
+                # Only a shad at the end of the buffer can still become a boundary
+                last_char_idx = len(buffer) - 1
+                while last_char_idx > 0 and buffer[last_char_idx] == " ":
+                    last_char_idx -= 1
+                search_start = last_char_idx
+                break
+
+            chunk_end = boundary.end()
+            yield buffer[:chunk_end]
+            buffer = buffer[chunk_end:]
+            search_start = chunk_size - 1
+
+    if buffer:
+        yield buffer
+
+
+def read_texts(
+    lines_or_file: Union[str, Iterable[str], IO[str]],
+    block_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterable[str]:
+    """
+    input: gold corpus as a string, lines or an opened file
+    output/return: pieces of the gold corpus, an opened file is read block_size characters at a time
+    """
+    if isinstance(lines_or_file, str):
+        return [lines_or_file]
+    if hasattr(lines_or_file, "read"):
+        return iter(partial(lines_or_file.read, block_size), "")
+    return lines_or_file
+
+
+def split_text_at_shads_with_last(
+    lines_or_file: Union[str, Iterable[str], IO[str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Same as split_text_at_shads on read_texts(lines_or_file), yields each chunk
+    with True if it is the last chunk of the gold corpus
+    """
+    chunks = split_text_at_shads(read_texts(lines_or_file, chunk_size), chunk_size)
+    chunk = next(chunks, None)
+    while chunk is not None:
+        next_chunk = next(chunks, None)
+        yield chunk, next_chunk is None
+        chunk = next_chunk
+
+
+def prepare_gold_corpus_for_tokenizer_iter(
+    lines_or_file: Union[str, Iterable[str], IO[str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    input: gold corpus as a string, lines or an opened file
+    output/return: cleaned chunks, joined together they are the output of prepare_gold_corpus_for_tokenizer
+    *Note: only a chunk of about chunk_size characters is preprocessed at a time
+    """
+    for chunk, is_last_chunk in split_text_at_shads_with_last(
+        lines_or_file, chunk_size
+    ):
+        prepared_chunk = prepare_gold_corpus_for_tokenizer(chunk)
+        # The space after the last shad is stripped from the chunk, eg: 'ཡོད། ' -> 'ཡོད།'
+        if not is_last_chunk and chunk.endswith(" "):
+            prepared_chunk += " "
+        if prepared_chunk:
+            yield prepared_chunk
+
+
+def transform_gold_corpus_for_tagging_iter(
+    lines_or_file: Union[str, Iterable[str], IO[str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    input: gold corpus as a string, lines or an opened file
+    output/return: cleaned chunks, joined together they are the output of transform_gold_corpus_for_tagging
+    *Note: only a chunk of about chunk_size characters is preprocessed at a time
+    """
+    for chunk, is_last_chunk in split_text_at_shads_with_last(
+        lines_or_file, chunk_size
+    ):
+        transformed_chunk = transform_gold_corpus_for_tagging(chunk)
+        # The spaces after the last shad are stripped from the chunk, in the whole
+        # gold corpus they are kept as '_' i.e 'ཡོད། ' -> 'ཡོད ། ' instead of 'ཡོད །_ '
+        if not is_last_chunk and chunk.endswith(" "):
+            transformed_chunk = transformed_chunk.rstrip() + "_ "
+        if transformed_chunk:
+            yield transformed_chunk
 
 
 if __name__ == "__main__":
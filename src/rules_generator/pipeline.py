@@ -2,7 +2,7 @@ import re
 from pathlib import Path
 
 from rules_generator.rdr_to_cql import convert_rdr_to_cql
-from rules_generator.tagger import tagger
+from rules_generator.tagger import group_POS_by_sentence, tagger_with_POS
 from rules_generator.train_tag_rdr import train_with_external_rdr
 
 
@@ -18,12 +18,16 @@ def convert_tags_to_perfect_tag(text: str) -> str:
     return re.sub(pattern, replacement, text)
 
 
-def pipeline(gold_corpus):
-    tagger_output = tagger(gold_corpus)
+def pipeline(gold_corpus, workers=1):
+    # botok POS of the tagged words are kept for the RDR learner
+    tagger_output, words_POS = tagger_with_POS(gold_corpus, workers)
+    sentences_POS = group_POS_by_sentence(tagger_output, words_POS)
 
     external_tagger_output = convert_tags_to_perfect_tag(tagger_output)
-    rdr_rules = train_with_external_rdr(tagger_output, external_tagger_output, (3, 2))
-    cql_rules = convert_rdr_to_cql(rdr_rules)
+    rdr_rules = train_with_external_rdr(
+        tagger_output, external_tagger_output, (3, 2), sentences_POS, workers
+    )
+    cql_rules = convert_rdr_to_cql(rdr_rules, workers)
     return cql_rules
 
 
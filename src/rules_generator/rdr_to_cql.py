@@ -1,13 +1,17 @@
+from concurrent.futures import ProcessPoolExecutor
 from itertools import combinations
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Optional
 
 from rules_generator.Utility.get_POS import get_POS
 from rules_generator.Utility.get_syllables import get_syllables
+from rules_generator.Utility.pos_lexicon import get_POS_lexicon, open_POS_lexicon
 from rules_generator.Utility.rdr_to_cql_replace_matcher import find_levels, find_rules
 
 NO_POS = "NO_POS"
 empty_POS = '"'
+# Words given to each worker at a time when their POS are looked up in parallel
+POS_LOOKUP_CHUNK_SIZE = 256
 
 
 def find_combinations_of_matches(list_of_dicts):
@@ -203,7 +207,9 @@ def remove_double_and_single_quotes(word: str) -> str:
     return word.replace('"', "").replace('"', "")
 
 
-def generate_affix_rule(rdr_condition, rdr_conclusion, affix_modification):
+def generate_affix_rule(
+    rdr_condition, rdr_conclusion, affix_modification, get_word_POS=get_POS
+):
     """
     each cql rule should be as follows: <matchcql>\t<index>\t<operation>\t<replacecql>
     cql example :
@@ -249,11 +255,11 @@ def generate_affix_rule(rdr_condition, rdr_conclusion, affix_modification):
 
             left_splited_word = remove_double_and_single_quotes(left_splited_word)
 
-            left_splited_word_POS = get_POS(left_splited_word)
+            left_splited_word_POS = get_word_POS(left_splited_word)
             right_splited_word = rdr_condition_syls[syl_index][affix_partner_length:]
             right_splited_word = remove_double_and_single_quotes(right_splited_word)
 
-            right_splited_word_POS = get_POS(right_splited_word)
+            right_splited_word_POS = get_word_POS(right_splited_word)
 
             replace_cql = ""
             if left_splited_word_POS in [
@@ -308,7 +314,7 @@ def generate_affix_rule(rdr_condition, rdr_conclusion, affix_modification):
 
             merged_word = rdr_condition_text.replace("-", "")
             merged_word = remove_double_and_single_quotes(merged_word)
-            merged_word_POS = get_POS(merged_word)
+            merged_word_POS = get_word_POS(merged_word)
             operation_cql = "+"
             temp_rdr_condition = {}
             for key_index in list(rdr_condition.keys()):
@@ -318,11 +324,11 @@ def generate_affix_rule(rdr_condition, rdr_conclusion, affix_modification):
                 if key_index == word_index:
                     temp_rdr_condition[key_index] = {
                         "text": left_splited_word,
-                        "pos": get_POS(left_splited_word),
+                        "pos": get_word_POS(left_splited_word),
                     }
                     temp_rdr_condition[key_index + 1] = {
                         "text": right_splited_word,
-                        "pos": get_POS(right_splited_word),
+                        "pos": get_word_POS(right_splited_word),
                     }
                     continue
 
@@ -462,7 +468,9 @@ def is_split_rule_needed(rdr_condition, rdr_conclusion):
     return need_split_rule_generation, split_modification
 
 
-def generate_merge_rule(rdr_condition, rdr_conclusion, merge_modification):
+def generate_merge_rule(
+    rdr_condition, rdr_conclusion, merge_modification, get_word_POS=get_POS
+):
     # Collecting all the cql rule string
 
     merge_cql_rules_collection = ""
@@ -479,7 +487,7 @@ def generate_merge_rule(rdr_condition, rdr_conclusion, merge_modification):
         right_merge_word = rdr_condition[merge_index + 1]["text"]
         new_merged_word = left_merge_word + right_merge_word
         new_merged_word = remove_double_and_single_quotes(new_merged_word)
-        new_merged_word_POS = get_POS(new_merged_word)
+        new_merged_word_POS = get_word_POS(new_merged_word)
         if new_merged_word_POS in [NO_POS, empty_POS]:
             replace_cql = "[]"
         else:
@@ -524,7 +532,9 @@ def generate_merge_rule(rdr_condition, rdr_conclusion, merge_modification):
     return merge_cql_rules_collection, rdr_condition, rdr_conclusion
 
 
-def generate_split_rule(rdr_condition, rdr_conclusion, split_modification):
+def generate_split_rule(
+    rdr_condition, rdr_conclusion, split_modification, get_word_POS=get_POS
+):
     # Collecting all the cql rule string
     # split_modification is list of tuples, storing index and syllable index of the word to split
 
@@ -552,10 +562,10 @@ def generate_split_rule(rdr_condition, rdr_conclusion, split_modification):
 
         left_splited_word = "".join(rdr_condition_syls[:syl_index])
         left_splited_word = remove_double_and_single_quotes(left_splited_word)
-        left_splited_word_POS = get_POS(left_splited_word)
+        left_splited_word_POS = get_word_POS(left_splited_word)
         right_splited_word = "".join(rdr_condition_syls[syl_index:])
         right_splited_word = remove_double_and_single_quotes(right_splited_word)
-        right_splited_word_POS = get_POS(right_splited_word)
+        right_splited_word_POS = get_word_POS(right_splited_word)
 
         replace_cql = ""
         if left_splited_word_POS in [NO_POS, empty_POS] and right_splited_word_POS in [
@@ -656,9 +666,24 @@ def generate_match_cql_string(rdr_condition, rdr_conclusion):
     return " ".join(match_cql)
 
 
-def convert_rdr_to_cql(rdr_string):
+def convert_rdr_to_cql(rdr_string, workers: int = 1):
+    """
+    input: rules learned by RDR
+    output/return: CQL rules, one rule per line
+    *Note: the POS of all the words in the CQL rules are looked up first in one batch
+    (in a pool of processes if workers > 1), then the rules are generated from them
+    """
     rdr_rules = parse_rdr_rules(rdr_string)
     rdr_rules = filter_only_neccessary_rdr_rules(rdr_rules)
+
+    words_POS = get_words_POS(collect_POS_words(rdr_rules), workers)
+    cql_rules_collection = generate_cql_rules(rdr_rules, words_POS.__getitem__)
+
+    cql_rules_collection = remove_duplicates_and_join(cql_rules_collection)
+    return cql_rules_collection
+
+
+def generate_cql_rules(rdr_rules, get_word_POS: Callable[[str], str] = get_POS) -> str:
     cql_rules_collection = ""
     for idx, rdr_rule in enumerate(rdr_rules):
         rdr_condition = rdr_rule[0]
@@ -674,7 +699,7 @@ def convert_rdr_to_cql(rdr_string):
 
         if need_split_rule_generation:
             new_cql_split_rule, rdr_condition, rdr_conclusion = generate_split_rule(
-                rdr_condition, rdr_conclusion, split_modification
+                rdr_condition, rdr_conclusion, split_modification, get_word_POS
             )
             cql_rules_collection += f"{new_cql_split_rule}"
 
@@ -685,7 +710,7 @@ def convert_rdr_to_cql(rdr_string):
 
         if need_merge_rule_generation:
             new_cql_merge_rule, rdr_conclusion, rdr_conclusion = generate_merge_rule(
-                rdr_condition, rdr_conclusion, merge_modification
+                rdr_condition, rdr_conclusion, merge_modification, get_word_POS
             )
             cql_rules_collection += f"{new_cql_merge_rule}"
 
@@ -698,14 +723,50 @@ def convert_rdr_to_cql(rdr_string):
             # new rule generation
             # rdr condition and rdr conclusion will be updated
             new_cql_affix_rule = generate_affix_rule(
-                rdr_condition, rdr_conclusion, affix_modification
+                rdr_condition, rdr_conclusion, affix_modification, get_word_POS
             )
             cql_rules_collection += f"{new_cql_affix_rule}"
 
-    cql_rules_collection = remove_duplicates_and_join(cql_rules_collection)
     return cql_rules_collection
 
 
+def collect_POS_words(rdr_rules) -> List[str]:
+    """
+    Words which POS are needed to generate the CQL rules, without duplicates
+    *Note: POS only appear in the generated rules, they never change which rules are generated
+    """
+    words: Dict[str, None] = {}
+
+    def collect_word(word: str) -> str:
+        words[word] = None
+        return NO_POS
+
+    generate_cql_rules(rdr_rules, collect_word)
+    return list(words)
+
+
+def get_words_POS(words: Iterable[str], workers: int = 1) -> Dict[str, str]:
+    words = list(dict.fromkeys(words))
+    if workers <= 1 or len(words) <= POS_LOOKUP_CHUNK_SIZE:
+        return {word: get_POS(word) for word in words}
+
+    lexicon = get_POS_lexicon()
+    lexicon_path = lexicon.path if lexicon is not None else None
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=warm_up_POS_lookup,
+        initargs=(lexicon_path,),
+    ) as executor:
+        words_POS = executor.map(get_POS, words, chunksize=POS_LOOKUP_CHUNK_SIZE)
+        return dict(zip(words, words_POS))
+
+
+def warm_up_POS_lookup(lexicon_path: Optional[Path] = None):
+    # Workers look up words in the same POS lexicon as the main process
+    if lexicon_path is not None:
+        open_POS_lexicon(lexicon_path)
+
+
 def remove_duplicates_and_join(input_string: str) -> str:
     # Split the input string into lines
     lines = input_string.split("\n")
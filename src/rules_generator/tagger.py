@@ -1,12 +1,40 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
 from pathlib import Path
-from typing import List, Tuple
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
 
 from botok import TSEK
 
+from rules_generator.alignment import (
+    QuarantinedRegion,
+    find_first_divergent_syllable,
+    find_window_end,
+    get_syllable_stream,
+)
 from rules_generator.compare_strings import is_corpus_tokenization_identical
-from rules_generator.data_processor import transform_gold_corpus_for_tagging
-from rules_generator.tokenizer_pipeline import botok_word_tokenizer_pipeline
+from rules_generator.data_processor import (
+    DEFAULT_CHUNK_SIZE,
+    split_text_at_shads,
+    split_text_at_shads_with_last,
+    transform_gold_corpus_for_tagging,
+)
+from rules_generator.RDRPOSTagger.SCRDRlearner.Object import (
+    add_newline_to_shad,
+    splitPOSBySentence,
+)
+from rules_generator.tokenizer_pipeline import botok_word_tokenizer_pipeline_with_POS
+from rules_generator.Utility.botok_session import get_botok_session
 from rules_generator.Utility.get_syllables import get_syllables
+from rules_generator.Utility.tokenization_cache import (
+    get_tokenization_cache,
+    open_tokenization_cache,
+)
+
+# Number of shards given to each worker when tagging in parallel
+SHARDS_PER_WORKER = 4
+TOKENIZATION_MISMATCH_ERROR = (
+    "Error tagger.py: Output of gold corpus and tokenized output does not match."
+)
 
 
 def split_words_into_syllables(words_list: List[str]) -> List[str]:
@@ -68,48 +96,7 @@ def find_next_matching_words(
     Find the next matching words between botok and gold corpus starting from given indices.
     Returns the indices of the last matching words found.
     """
-    gold_last_idx, tok_last_idx = gold_idx, tok_idx
-
-    while tok_last_idx < len(tokenized_words) and gold_last_idx < len(
-        gold_corpus_words
-    ):
-
-        curr_tok_word = filter_underscore(tokenized_words[tok_last_idx])
-        curr_gold_word = filter_underscore(gold_corpus_words[gold_last_idx])
-
-        condition_1 = curr_tok_word == curr_gold_word
-
-        unmatched_tok_words = "".join(
-            tokenized_words[i] for i in range(tok_idx, tok_last_idx + 1)
-        )
-        unmatched_gold_words = "".join(
-            gold_corpus_words[i] for i in range(gold_idx, gold_last_idx + 1)
-        )
-
-        unmatched_tok_words = filter_underscore(filter_hyphen(unmatched_tok_words))
-        unmatched_gold_words = filter_underscore(filter_hyphen(unmatched_gold_words))
-
-        condition2 = unmatched_tok_words == unmatched_gold_words
-        if condition_1 and condition2:
-            break
-
-        unmatched_tok_syls = split_words_into_syllables(
-            [tokenized_words[i] for i in range(tok_idx, tok_last_idx + 1)]
-        )
-
-        unmatched_gold_syls = split_words_into_syllables(
-            [gold_corpus_words[i] for i in range(gold_idx, gold_last_idx + 1)]
-        )
-
-        if len(unmatched_tok_syls) > len(unmatched_gold_syls):
-            gold_last_idx += 1
-        elif len(unmatched_tok_syls) < len(unmatched_gold_syls):
-            tok_last_idx += 1
-        else:
-            gold_last_idx += 1
-            tok_last_idx += 1
-
-    return gold_last_idx, tok_last_idx
+    return find_window_end(tokenized_words, gold_corpus_words, tok_idx, gold_idx)
 
 
 def tag_unmatched_words(
@@ -131,7 +118,7 @@ def tag_unmatched_words(
     unmatched_tokenized_words = tokenized_words[tok_idx:tok_last_idx]
 
     tagged_gold_idx = 0
-    tagged_content = ""
+    tagged_content = []
 
     for unmatched_tokenized_word in unmatched_tokenized_words:
         unmatched_tokenzied_syls = get_syllables(unmatched_tokenized_word)
@@ -150,49 +137,408 @@ def tag_unmatched_words(
             unmatched_tok_idx += 1
             tokenized_tags += tagged_gold_syls[i + 1]
 
-        tagged_content += tokenized_syls + "/" + tokenized_tags + " "
+        tagged_content.append(tokenized_syls + "/" + tokenized_tags + " ")
         tagged_gold_idx = tagged_gold_idx + (2 * unmatched_tokenzied_syls_count)
 
-    return tagged_content, gold_last_idx, tok_last_idx
+    return "".join(tagged_content), gold_last_idx, tok_last_idx
 
 
-def tagger(gold_corpus: str) -> str:
-    gold_corpus_cleaned = transform_gold_corpus_for_tagging(gold_corpus)
-    tokenized_output = botok_word_tokenizer_pipeline(gold_corpus)
-
-    is_syls_separated_correctly = is_corpus_tokenization_identical(
-        gold_corpus_cleaned, tokenized_output
+def tag_words(tokenized_words: List[str], gold_corpus_words: List[str]) -> str:
+    """
+    Tags the tokenized words with the segmentation of the gold corpus words,
+    both word lists should have the same syllables.
+    """
+    tagged_content, _ = tag_words_and_check_alignment(
+        tokenized_words, gold_corpus_words
     )
+    return tagged_content
 
-    if not is_syls_separated_correctly:
-        return "Error tagger.py: Output of gold corpus and tokenized output does not match."
-
-    gold_corpus_words = gold_corpus_cleaned.split()
-    tokenized_words = tokenized_output.split()
 
+def tag_words_and_check_alignment(
+    tokenized_words: List[str], gold_corpus_words: List[str]
+) -> Tuple[str, bool]:
+    """
+    Same as tag_words, also returns if both word lists end on the same word.
+    If they do not, the last words are still waiting for their matching words.
+    """
     gold_idx, tok_idx = 0, 0
-    tagged_content = ""
+    tagged_content = []
+    is_last_word_matched = False
 
     while tok_idx < len(tokenized_words) and gold_idx < len(gold_corpus_words):
         # Checking if the word is the same (ignoring '_' due to possible shads alignment)
-
+        # Eg: ཤོག  and ཤོག_ are same
         curr_tok_word = filter_underscore(tokenized_words[tok_idx])
         curr_gold_word = filter_underscore(gold_corpus_words[gold_idx])
         # If the word matches perfectly in output of both botok and gold corpus
         if curr_tok_word == curr_gold_word:
-            tagged_content += tokenized_words[tok_idx] + "/U "
+            tagged_content.append(tokenized_words[tok_idx] + "/U ")
             gold_idx += 1
             tok_idx += 1
+            is_last_word_matched = True
             continue
 
         unmatched_tagged_content, gold_idx, tok_idx = tag_unmatched_words(
             tokenized_words, gold_corpus_words, tok_idx, gold_idx
         )
-        tagged_content += unmatched_tagged_content
+        tagged_content.append(unmatched_tagged_content)
+        is_last_word_matched = False
+
+    is_aligned = (
+        is_last_word_matched
+        and tok_idx == len(tokenized_words)
+        and gold_idx == len(gold_corpus_words)
+    )
+    return "".join(tagged_content), is_aligned
+
 
+def tagger(
+    gold_corpus: str,
+    workers: int = 1,
+    quarantine: Optional[List[QuarantinedRegion]] = None,
+) -> str:
+    """
+    input: gold corpus where words are separated with space by human annotators
+    output/return: botok words tagged with the gold corpus segmentation
+    *Note: with workers > 1, the corpus is split into shards tagged in parallel.
+    If a quarantine list is given, sentences which botok output does not match are
+    skipped and added to the list, instead of returning an error for the whole corpus
+    """
+    tagged_content, _ = tagger_with_POS(gold_corpus, workers, quarantine)
     return tagged_content
 
 
+def tagger_with_POS(
+    gold_corpus: str,
+    workers: int = 1,
+    quarantine: Optional[List[QuarantinedRegion]] = None,
+) -> Tuple[str, List[str]]:
+    """
+    Same as tagger, also returns botok POS of each tagged word (empty on error)
+    *Note: tag_words keeps one tagged word per botok word, so the POS of botok output
+    can be given to the RDR learner instead of running botok again on the tagged words
+    """
+    if workers > 1:
+        return tag_gold_corpus_in_parallel(gold_corpus, workers, quarantine)
+
+    if quarantine is not None:
+        tagged_segments, words_POS = [], []
+        for tagged_segment, segment_words_POS in tagger_iter_with_POS(
+            gold_corpus, quarantine=quarantine
+        ):
+            tagged_segments.append(tagged_segment)
+            words_POS += segment_words_POS
+        return "".join(tagged_segments), words_POS
+
+    gold_corpus_cleaned = transform_gold_corpus_for_tagging(gold_corpus)
+    tokenized_output, words_POS = botok_word_tokenizer_pipeline_with_POS(gold_corpus)
+
+    is_syls_separated_correctly = is_corpus_tokenization_identical(
+        gold_corpus_cleaned, tokenized_output
+    )
+
+    if not is_syls_separated_correctly:
+        return TOKENIZATION_MISMATCH_ERROR, []
+
+    gold_corpus_words = gold_corpus_cleaned.split()
+    tokenized_words = tokenized_output.split()
+
+    return tag_words(tokenized_words, gold_corpus_words), words_POS
+
+
+def group_POS_by_sentence(tagged_content: str, words_POS: List[str]) -> List[List[str]]:
+    """
+    POS of the tagged words of each sentence, the sentences being split at shads as
+    the RDR learner splits its corpus
+    """
+    sentences = add_newline_to_shad(tagged_content).splitlines()
+    return splitPOSBySentence(sentences, words_POS)
+
+
+def tokenize_gold_corpus_chunk(gold_corpus_chunk: str) -> Tuple[str, str, List[str]]:
+    """
+    Returns the gold corpus chunk transformed for tagging, its botok output and the
+    botok POS of each word of the output
+    """
+    gold_corpus_cleaned = transform_gold_corpus_for_tagging(gold_corpus_chunk)
+    tokenized_output, words_POS = botok_word_tokenizer_pipeline_with_POS(
+        gold_corpus_chunk
+    )
+    return gold_corpus_cleaned, tokenized_output, words_POS
+
+
+def has_stripped_shad_spaces(gold_corpus_chunk: str, is_last_chunk: bool) -> bool:
+    # The spaces after the last shad are stripped from the chunk, when tagging
+    # the whole corpus they are kept as '_' i.e ཡོད །_
+    return not is_last_chunk and gold_corpus_chunk.endswith(" ")
+
+
+def tag_tokenized_chunk(
+    gold_corpus_cleaned: str, tokenized_output: str, has_shad_spaces: bool
+) -> Tuple[str, bool]:
+    gold_corpus_words = gold_corpus_cleaned.split()
+    tokenized_words = tokenized_output.split()
+
+    if has_shad_spaces and gold_corpus_words and tokenized_words:
+        gold_corpus_words[-1] += "_"
+        tokenized_words[-1] += "_"
+
+    return tag_words_and_check_alignment(tokenized_words, gold_corpus_words)
+
+
+def tag_gold_corpus_chunk(
+    gold_corpus_chunk: str, is_last_chunk: bool
+) -> Tuple[str, bool, List[str]]:
+    """
+    Tags a chunk from split_text_at_shads, returns the tagged chunk,
+    if the chunk is aligned (see tag_words_and_check_alignment) and the botok POS
+    of the tagged words
+    """
+    gold_corpus_cleaned, tokenized_output, words_POS = tokenize_gold_corpus_chunk(
+        gold_corpus_chunk
+    )
+    if not is_corpus_tokenization_identical(gold_corpus_cleaned, tokenized_output):
+        raise ValueError(TOKENIZATION_MISMATCH_ERROR)
+
+    tagged_chunk, is_aligned = tag_tokenized_chunk(
+        gold_corpus_cleaned,
+        tokenized_output,
+        has_stripped_shad_spaces(gold_corpus_chunk, is_last_chunk),
+    )
+    return tagged_chunk, is_aligned, words_POS
+
+
+def tag_gold_corpus_text(
+    gold_corpus_text: str,
+    is_last_chunk: bool,
+    offset: int = 0,
+    quarantine: Optional[List[QuarantinedRegion]] = None,
+) -> Tuple[str, bool, List[str]]:
+    """
+    Same as tag_gold_corpus_chunk, if a quarantine list is given the sentences which
+    botok output does not match are added to it (offset is the position of the text
+    in the gold corpus) and the rest of the text is tagged.
+    *Note: when the text does not match, each sentence is tokenized once and the
+    sentences between the quarantined ones are tagged together from their tokens
+    """
+    if quarantine is None:
+        return tag_gold_corpus_chunk(gold_corpus_text, is_last_chunk)
+
+    gold_corpus_cleaned, tokenized_output, words_POS = tokenize_gold_corpus_chunk(
+        gold_corpus_text
+    )
+    if is_corpus_tokenization_identical(gold_corpus_cleaned, tokenized_output):
+        tagged_text, is_aligned = tag_tokenized_chunk(
+            gold_corpus_cleaned,
+            tokenized_output,
+            has_stripped_shad_spaces(gold_corpus_text, is_last_chunk),
+        )
+        return tagged_text, is_aligned, words_POS
+
+    sentences = list(split_text_at_shads([gold_corpus_text], 1))
+    tagged_content = []
+    words_POS = []
+    is_aligned = True
+    # Words of the matching sentences following the last quarantined one
+    gold_corpus_words: List[str] = []
+    tokenized_words: List[str] = []
+
+    for sentence_idx, sentence in enumerate(sentences):
+        sentence_offset = offset
+        offset += len(sentence)
+        (
+            sentence_cleaned,
+            tokenized_sentence,
+            sentence_words_POS,
+        ) = tokenize_gold_corpus_chunk(sentence)
+
+        if is_corpus_tokenization_identical(sentence_cleaned, tokenized_sentence):
+            sentence_gold_words = sentence_cleaned.split()
+            sentence_tokenized_words = tokenized_sentence.split()
+            is_last_sentence = is_last_chunk and sentence_idx == len(sentences) - 1
+            if (
+                has_stripped_shad_spaces(sentence, is_last_sentence)
+                and sentence_gold_words
+                and sentence_tokenized_words
+            ):
+                sentence_gold_words[-1] += "_"
+                sentence_tokenized_words[-1] += "_"
+            gold_corpus_words += sentence_gold_words
+            tokenized_words += sentence_tokenized_words
+            words_POS += sentence_words_POS
+            continue
+
+        if tokenized_words:
+            tagged_text, _ = tag_words_and_check_alignment(
+                tokenized_words, gold_corpus_words
+            )
+            tagged_content.append(tagged_text)
+            gold_corpus_words, tokenized_words = [], []
+
+        gold_syllables = get_syllable_stream(sentence_cleaned)
+        tokenized_syllables = get_syllable_stream(tokenized_sentence)
+        divergent_syl_idx = find_first_divergent_syllable(
+            gold_syllables, tokenized_syllables
+        )
+        quarantine.append(
+            QuarantinedRegion(
+                start=sentence_offset,
+                end=offset,
+                syllable_idx=divergent_syl_idx,
+                gold_syllable=get_syllable_at(gold_syllables, divergent_syl_idx),
+                tokenized_syllable=get_syllable_at(
+                    tokenized_syllables, divergent_syl_idx
+                ),
+            )
+        )
+
+    if tokenized_words:
+        tagged_text, is_aligned = tag_words_and_check_alignment(
+            tokenized_words, gold_corpus_words
+        )
+        tagged_content.append(tagged_text)
+
+    return "".join(tagged_content), is_aligned, words_POS
+
+
+def get_syllable_at(syllables: List[str], syl_idx: int) -> str:
+    return syllables[syl_idx] if syl_idx < len(syllables) else ""
+
+
+def tag_gold_corpus_shard(
+    shard: str, is_last_shard: bool, offset: int, is_quarantining: bool
+) -> Tuple[str, bool, List[str], List[QuarantinedRegion]]:
+    quarantine: Optional[List[QuarantinedRegion]] = [] if is_quarantining else None
+    tagged_shard, is_aligned, words_POS = tag_gold_corpus_text(
+        shard, is_last_shard, offset, quarantine
+    )
+    return tagged_shard, is_aligned, words_POS, quarantine or []
+
+
+def warm_up_tokenizer(cache_path: Optional[Path] = None, cache_max_size: int = 0):
+    # Loads botok dictionaries once in each worker instead of on its first shard
+    get_botok_session()
+    # A sqlite connection can not be used by another process, each worker opens its own
+    if cache_path is not None:
+        open_tokenization_cache(cache_path, cache_max_size)
+
+
+def tag_gold_corpus_in_parallel(
+    gold_corpus: str,
+    workers: int,
+    quarantine: Optional[List[QuarantinedRegion]] = None,
+) -> Tuple[str, List[str]]:
+    shard_size = max(1, len(gold_corpus) // (workers * SHARDS_PER_WORKER))
+    shards = list(split_text_at_shads([gold_corpus], shard_size))
+    is_last_shard = [False] * (len(shards) - 1) + [True]
+    shard_offsets = [0] + list(accumulate(len(shard) for shard in shards[:-1]))
+    is_quarantining = [quarantine is not None] * len(shards)
+
+    cache = get_tokenization_cache()
+    cache_args = (cache.path, cache.max_size) if cache is not None else ()
+    if cache is not None:
+        cache.commit()
+
+    tagged_content = []
+    words_POS: List[str] = []
+    unaligned_text, unaligned_offset = "", 0
+    try:
+        with ProcessPoolExecutor(
+            workers, initializer=warm_up_tokenizer, initargs=cache_args
+        ) as executor:
+            tagged_shards = executor.map(
+                tag_gold_corpus_shard,
+                shards,
+                is_last_shard,
+                shard_offsets,
+                is_quarantining,
+            )
+            for shard, is_last, offset, tagged_shard_output in zip(
+                shards, is_last_shard, shard_offsets, tagged_shards
+            ):
+                (
+                    tagged_shard,
+                    is_aligned,
+                    shard_words_POS,
+                    quarantined_regions,
+                ) = tagged_shard_output
+                # A shard following an unaligned shard is tagged again together with it
+                if unaligned_text:
+                    (
+                        tagged_shard,
+                        is_aligned,
+                        shard_words_POS,
+                        quarantined_regions,
+                    ) = tag_gold_corpus_shard(
+                        unaligned_text + shard,
+                        is_last,
+                        unaligned_offset,
+                        quarantine is not None,
+                    )
+
+                if is_aligned or is_last:
+                    unaligned_text = ""
+                    tagged_content.append(tagged_shard)
+                    words_POS += shard_words_POS
+                    if quarantine is not None:
+                        quarantine.extend(quarantined_regions)
+                else:
+                    if not unaligned_text:
+                        unaligned_offset = offset
+                    unaligned_text += shard
+    except ValueError as error:
+        return str(error), []
+
+    return "".join(tagged_content), words_POS
+
+
+def tagger_iter(
+    lines_or_file: Union[str, Iterable[str], IO[str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    quarantine: Optional[List[QuarantinedRegion]] = None,
+) -> Iterator[str]:
+    """
+    input: gold corpus as a string, lines or an opened file
+    output/return: tagged segments, joined together they are the output of tagger
+    *Note: the corpus is split at shads into chunks of about chunk_size characters
+    and each chunk is tagged alone, so memory does not grow with the corpus size.
+    With a quarantine list, see tagger.
+    """
+    for tagged_chunk, _ in tagger_iter_with_POS(lines_or_file, chunk_size, quarantine):
+        yield tagged_chunk
+
+
+def tagger_iter_with_POS(
+    lines_or_file: Union[str, Iterable[str], IO[str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    quarantine: Optional[List[QuarantinedRegion]] = None,
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Same as tagger_iter, also yields botok POS of the tagged words of each segment
+    """
+    unaligned_text = ""
+    offset = 0
+
+    for gold_corpus_chunk, is_last_chunk in split_text_at_shads_with_last(
+        lines_or_file, chunk_size
+    ):
+        quarantined_regions_count = len(quarantine) if quarantine is not None else 0
+
+        tagged_chunk, is_aligned, words_POS = tag_gold_corpus_text(
+            unaligned_text + gold_corpus_chunk, is_last_chunk, offset, quarantine
+        )
+        # Words at the end of an unaligned chunk are matched with words of the next chunk
+        if is_aligned or is_last_chunk:
+            offset += len(unaligned_text) + len(gold_corpus_chunk)
+            unaligned_text = ""
+            yield tagged_chunk, words_POS
+        else:
+            # The chunk is quarantined again when tagged with the next one
+            if quarantine is not None:
+                del quarantine[quarantined_regions_count:]
+            unaligned_text += gold_corpus_chunk
+
+
 if __name__ == "__main__":
     file_string = Path("src/data/TIB_train.txt").read_text(encoding="utf-8")
     tagged_output = tagger(file_string)
@@ -1,33 +1,148 @@
+import json
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
 from botok import Text
+from botok.tokenizers.token import Token
 
 from rules_generator.data_processor import (
+    AFFIX_SPACE_PATTERN,
+    adjust_spaces_for_affix,
     prepare_gold_corpus_for_tokenizer,
     remove_extra_spaces,
+    split_text_at_shads,
 )
-from rules_generator.Utility.regex_replacer import replace_with_regex
+from rules_generator.Utility.botok_session import get_botok_session
+from rules_generator.Utility.get_POS import POS_CACHE_SIZE
+from rules_generator.Utility.tokenization_cache import get_tokenization_cache
 
 
 def botok_word_tokenizer_pipeline(gold_corpus: str) -> str:
     """
     input: string of a file before going under max match(botok)
     output/return: cleaned/preprocess string and word segmented
+    *Note: if a tokenization cache is opened, only sentences not in the cache go to botok
     """
-    preprocessed_text = prepare_gold_corpus_for_tokenizer(gold_corpus)
+    tokenized_text, _ = botok_word_tokenizer_pipeline_with_POS(gold_corpus)
+    return tokenized_text
+
+
+def botok_word_tokenizer_pipeline_with_POS(gold_corpus: str) -> Tuple[str, List[str]]:
+    """
+    Same as botok_word_tokenizer_pipeline, also returns botok POS of each word of the output
+    Eg: 'རིན་པོ་ཆེ འི་' -> ('རིན་པོ་ཆེ-འི་', ['NOUN']), a word with an affix gets the POS of
+    the whole word (see get_affixed_word_POS)
+    """
+    cache = get_tokenization_cache()
+    if cache is None:
+        return tokenize_preprocessed_text_with_POS(
+            prepare_gold_corpus_for_tokenizer(gold_corpus)
+        )
+
+    sentences = list(split_text_at_shads([gold_corpus], 1))
+    tokenized_sentences = []
+    words_POS: List[str] = []
+    for sentence_idx, sentence in enumerate(sentences):
+        tokenized_sentence, sentence_words_POS = json.loads(
+            cache.get_or_tokenize(
+                "words_whole_pos",
+                prepare_gold_corpus_for_tokenizer(sentence),
+                tokenize_preprocessed_text_to_json,
+            )
+        )
+        # Spaces after the last shad are stripped from the sentence, in the whole text
+        # they are part of the shad token i.e །_
+        is_last_sentence = sentence_idx == len(sentences) - 1
+        if tokenized_sentence and sentence.endswith(" ") and not is_last_sentence:
+            tokenized_sentence += "_"
+        if tokenized_sentence:
+            tokenized_sentences.append(tokenized_sentence)
+            words_POS += sentence_words_POS
+    cache.commit()
+
+    return " ".join(tokenized_sentences), words_POS
+
+
+def tokenize_preprocessed_text(preprocessed_text: str) -> str:
+    tokenized_text, _ = tokenize_preprocessed_text_with_POS(preprocessed_text)
+    return tokenized_text
+
+
+def tokenize_preprocessed_text_with_POS(
+    preprocessed_text: str,
+) -> Tuple[str, List[str]]:
     tokenizer = Text(preprocessed_text)
-    tokenized_text = tokenizer.tokenize_words_raw_text
+    tokens = tokenizer.custom_pipeline(
+        "basic_cleanup", word_tokenize, keep_tokens, keep_tokens
+    )
+    # Same as botok 'words_raw_text' and 'plaintext' pipes
+    tokenized_text = " ".join(token.text.replace(" ", "_") for token in tokens)
     tokenized_text = remove_extra_spaces(tokenized_text)
+    tokens_POS = [token.pos for token in tokens if token.text]
+
+    # Words joined with their affix get the POS of the whole word
+    affix_spaces = {
+        match.start(2) - 1 for match in AFFIX_SPACE_PATTERN.finditer(tokenized_text)
+    }
+    words_POS = tokens_POS[:1]
+    words = tokenized_text.split(" ")[:1]
+    affixed_word_indexes = set()
+    space_idx = tokenized_text.find(" ")
+    for token_POS in tokens_POS[1:]:
+        next_space_idx = tokenized_text.find(" ", space_idx + 1)
+        token_text = tokenized_text[
+            space_idx + 1 : next_space_idx if next_space_idx != -1 else None  # noqa
+        ]
+        if space_idx not in affix_spaces:
+            words_POS.append(token_POS)
+            words.append(token_text)
+        else:
+            words[-1] += token_text
+            affixed_word_indexes.add(len(words) - 1)
+        space_idx = next_space_idx
+    for word_idx in affixed_word_indexes:
+        words_POS[word_idx] = (
+            get_affixed_word_POS(words[word_idx].replace("_", " "))
+            or words_POS[word_idx]
+        )
+
     tokenized_text = add_hyphens_to_affixes(tokenized_text)
-    return tokenized_text
+    return tokenized_text, words_POS
+
+
+def tokenize_preprocessed_text_to_json(preprocessed_text: str) -> str:
+    return json.dumps(
+        tokenize_preprocessed_text_with_POS(preprocessed_text), ensure_ascii=False
+    )
+
+
+@lru_cache(maxsize=POS_CACHE_SIZE)
+def get_affixed_word_POS(word_string: str) -> Optional[str]:
+    """
+    POS of a word joined with its affix, tokenized by botok without splitting the affix
+    as RDR learner used to get it (eg: བོད་པའི་), None if botok does not read one word
+    """
+    tokens = get_botok_session().tokenize(
+        word_string, split_affixes=False, spaces_as_punct=False
+    )
+    tokens = [token for token in tokens if token.text]
+    return tokens[0].pos if len(tokens) == 1 else None
+
+
+def keep_tokens(tokens: List[Token]) -> List[Token]:
+    return tokens
+
+
+def word_tokenize(text: str) -> List[Token]:
+    # Same as botok 'word_tok' pipe, with the tokenizer of the shared botok session
+    return get_botok_session().tokenize(text)
 
 
 def add_hyphens_to_affixes(text: str) -> str:
     """
     Input: རིན་པོ་ཆེའི་, tokenized output: རིན་པོ་ཆེ འི་, after replacement རིན་པོ་ཆེ-འི་
     """
-    pattern = r"((?![་།_༠༡༢༣༤༥༦༧༨༩])[\u0F00-\u0FFF]) (ར|ས|འི|འམ|འང|འོ|འིའོ|འིའམ|འིའང|འོའམ|འོའང)"
-    replacement = r"\1-\2"
-    text = replace_with_regex({pattern: replacement}, text)
-    return text
+    return adjust_spaces_for_affix(text)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import re
 from pathlib import Path
+from typing import List, Optional
 
 from rules_generator.RDRPOSTagger.pSCRDRtagger.ExtRDRPOSTagger import ExtRDR_RUN
 from rules_generator.RDRPOSTagger.pSCRDRtagger.RDRPOSTagger import run
@@ -15,11 +16,18 @@ def train_rdr(file_path: Path, THRESHOLD=(4, 4)):
 
 
 def train_with_external_rdr(
-    gold_corpus_tagged: str, external_tagged_corpus: str, THRESHOLD=(4, 4)
+    gold_corpus_tagged: str,
+    external_tagged_corpus: str,
+    THRESHOLD=(4, 4),
+    sentences_POS: Optional[List[List[str]]] = None,
+    workers: int = 1,
 ):
 
     """
-    Input: Gold standard corpus, tagged_string by external tagger, threshold
+    Input: Gold standard corpus, tagged_string by external tagger, threshold,
+    POS of the tagged words of each sentence (see tagger.group_POS_by_sentence, if not
+    given, botok is run again on the tagged words),
+    number of processes counting the candidate rules
     return rdr rules in string
     """
 
@@ -29,6 +37,8 @@ def train_with_external_rdr(
         gold_corpus_tagged,
         external_tagged_corpus,
         THRESHOLD,
+        sentences_POS,
+        workers,
     ]
     return ExtRDR_RUN(function_arguments)
 
@@ -0,0 +1,30 @@
+from rules_generator.alignment import (
+    count_syllables,
+    find_first_divergent_syllable,
+    find_window_end,
+    get_syllable_stream,
+)
+from rules_generator.tagger import tag_words
+
+
+def test_find_window_end():
+    tokenized_words = "ལ་ལ་ ལ་ལ་ ལ་བ་ ཡོད །_ དགེ-འོ་ བཀྲ་ཤིས་ཤོག །".split()
+    gold_corpus_words = "ལ་ ལ་ལ་ ལ་ ལ་བ་ ཡོད །_ དགེའོ་ བཀྲ་ཤིས་ ཤོག །".split()
+
+    assert count_syllables("ཕྲེང་་་བ") == 2
+    assert count_syllables("།_") == 1
+    assert find_window_end(tokenized_words, gold_corpus_words, 0, 0) == (3, 2)
+
+    assert (
+        tag_words(tokenized_words, gold_corpus_words)
+        == "ལ་ལ་/BB ལ་ལ་/IB ལ་བ་/U ཡོད/U །_/U དགེ-འོ་/B བཀྲ་ཤིས་ཤོག/BIB །/U "
+    )
+
+
+def test_find_first_divergent_syllable():
+    gold_syllables = get_syllable_stream("ལ་ ལ་ལ་ ཡོད །_ དགེ-འོ་ བཀྲ་ཤིས་ ཤོག །")
+    tokenized_syllables = get_syllable_stream("ལ་ལ་ ལ་ ཡོད །_ དགེ-འོ་ བཀྲ་ཤི་ཤོག །")
+
+    assert gold_syllables[:6] == ["ལ", "ལ", "ལ", "ཡོད", "།", "དགེའོ"]
+    assert find_first_divergent_syllable(gold_syllables, tokenized_syllables) == 7
+    assert find_first_divergent_syllable(gold_syllables, gold_syllables[:3]) == 3
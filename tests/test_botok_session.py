@@ -0,0 +1,23 @@
+from rules_generator.Utility.botok_session import (
+    BotokSession,
+    close_botok_session,
+    get_botok_session,
+)
+
+
+def test_botok_session():
+    with BotokSession() as session:
+        assert session.is_started
+        token_list = session.tokenize("ལ་ལ་ལ་ལ་ལ་བ་ཡོད་", split_affixes=False)
+        assert [token.text for token in token_list] == ["ལ་ལ་", "ལ་ལ་", "ལ་བ་", "ཡོད་"]
+    assert not session.is_started
+
+
+def test_get_botok_session():
+    session = get_botok_session()
+    assert get_botok_session() is session
+    assert session.trie is session.get_word_tokenizer().tok.trie
+
+    close_botok_session()
+    assert not session.is_started
+    assert get_botok_session() is not session
@@ -1,6 +1,11 @@
+import io
+
 from rules_generator.data_processor import (
     prepare_gold_corpus_for_tokenizer,
+    prepare_gold_corpus_for_tokenizer_iter,
+    split_text_at_shads,
     transform_gold_corpus_for_tagging,
+    transform_gold_corpus_for_tagging_iter,
 )
 
 
@@ -22,3 +27,43 @@ def test_transform_gold_corpus_for_tagging():
         )
         == "༄༅།_། རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་ རིན་པོ་ཆེ-འི་ ཕྲེང་་་བ །_ ལ་ ལ་ལ་ ལ་ ལ་བ་ ཡོད །_ དཔལ །_ དགེའོ་ བཀྲ་ཤིས་ ཤོག ། "
     )
+
+
+def test_transform_gold_corpus_for_tagging_spacing():
+    assert (
+        transform_gold_corpus_for_tagging("ཀ་༡ ༢  ༣ཁ་ abc d  ཀ།ལ། ༄༅། ། །ཀ")
+        == "ཀ་ ༡༢༣ ཁ་ abcd ཀ ། ལ །_༄༅།_།_། ཀ"
+    )
+
+
+def test_split_text_at_shads():
+    lines = [
+        "༄༅། །རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་\n",
+        "ཕྲེང་་་བ། ལ་ ལ་ལ་ ཡོད། དཔལ།  ",
+        "དགེའོ་ བཀྲ་ཤིས་ ཤོག།",
+    ]
+    assert list(split_text_at_shads(lines, chunk_size=5)) == [
+        "༄༅། །",
+        "རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་\nཕྲེང་་་བ། ",
+        "ལ་ ལ་ལ་ ཡོད། ",
+        "དཔལ།  ",
+        "དགེའོ་ བཀྲ་ཤིས་ ཤོག།",
+    ]
+
+
+def test_preprocessing_iter():
+    gold_corpus = (
+        "༄༅། །རྒྱལ་པོ་ ལ་ གཏམ་༡ ༢ ། ཕྲེང་་་བ། ལ་ ལ་ལ་ ཡོད། དཔལ།  དགེ འོ་ བཀྲ་ཤིས་ ཤོག།"
+    )
+
+    tagging_chunks = list(
+        transform_gold_corpus_for_tagging_iter(io.StringIO(gold_corpus), 5)
+    )
+    assert len(tagging_chunks) > 1
+    assert "".join(tagging_chunks) == transform_gold_corpus_for_tagging(gold_corpus)
+
+    tokenizer_chunks = list(
+        prepare_gold_corpus_for_tokenizer_iter([gold_corpus[:20], gold_corpus[20:]], 5)
+    )
+    assert len(tokenizer_chunks) > 1
+    assert "".join(tokenizer_chunks) == prepare_gold_corpus_for_tokenizer(gold_corpus)
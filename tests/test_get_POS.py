@@ -0,0 +1,17 @@
+from rules_generator.Utility.get_POS import get_most_frequent_POS
+
+
+def test_get_most_frequent_POS():
+    senses = [
+        {"pos": "OTHER", "freq": 322},
+        {"pos": "NOUN", "freq": 392115},
+        {"pos": "VERB", "freq": 392115},
+    ]
+    assert get_most_frequent_POS(senses) == "NOUN"
+    assert (
+        get_most_frequent_POS([{"pos": "PART"}, {"pos": "NOUN", "freq": 1}]) == "PART"
+    )
+    assert (
+        get_most_frequent_POS([{"pos": "NOUN", "freq": 2}, {"pos": "PART"}]) == "NOUN"
+    )
+    assert get_most_frequent_POS([]) == ""
@@ -34,3 +34,8 @@ def test_cql_rules():
 
 if __name__ == "__main__":
     test_cql_rules()
+
+
+def test_cql_rules_with_workers():
+    gold_corpus = Path("tests/data/TIB_gold_corpus.txt").read_text(encoding="utf-8")
+    assert pipeline(gold_corpus, 2) == pipeline(gold_corpus, 1)
@@ -0,0 +1,84 @@
+from rules_generator.Utility.botok_session import get_botok_session
+from rules_generator.Utility.get_POS import (
+    get_POS,
+    get_POS_cache_stats,
+    get_word_senses,
+)
+from rules_generator.Utility.pos_lexicon import (
+    POSLexicon,
+    close_POS_lexicon,
+    get_dialect_pack_fingerprint,
+    open_POS_lexicon,
+    write_POS_lexicon,
+)
+
+
+def test_pos_lexicon(tmp_path):
+    dictionary_path = tmp_path / "general" / "dictionary" / "words"
+    dictionary_path.mkdir(parents=True)
+    (dictionary_path / "words.tsv").write_text("ལས\tNOUN\n", encoding="utf-8")
+    lexicon_path = tmp_path / "pos_lexicon.sqlite"
+
+    senses = [{"pos": "NOUN", "freq": 4, "affixed": False}]
+    write_POS_lexicon(
+        lexicon_path,
+        get_dialect_pack_fingerprint(tmp_path / "general"),
+        [("ལས", "NOUN", senses), ("བཀྲ་ཤིས", "ADJ", [])],
+    )
+
+    with POSLexicon(lexicon_path, base_path=tmp_path) as lexicon:
+        assert lexicon.get_POS("ལས་") == "NOUN"
+        assert lexicon.get_POS("བཀྲ་ཤིས་") == "ADJ"
+        # Only the word ending with a single tsek was looked up when building
+        assert lexicon.get_POS("ལས") is None
+        assert lexicon.get_POS("ལས་་") is None
+        assert lexicon.get_POS("ཤིས་") is None
+        assert lexicon.get_senses("ལས") == senses
+        # Words missing from the lexicon are looked up in botok
+        assert lexicon.get_senses("ཤིས་") is None
+
+    # Changing the dialect pack invalidates the lexicon
+    (dictionary_path / "words.tsv").write_text("ལས\tVERB\tལས\n", encoding="utf-8")
+    with POSLexicon(lexicon_path, base_path=tmp_path) as lexicon:
+        assert lexicon.get_POS("ལས་") is None
+        assert lexicon.get_senses("ལས") is None
+
+
+def test_switching_pos_lexicon_clears_memoized_lookups(tmp_path):
+    dictionary_path = tmp_path / "general" / "dictionary" / "words"
+    dictionary_path.mkdir(parents=True)
+    (dictionary_path / "words.tsv").write_text("ལས\tNOUN\n", encoding="utf-8")
+    fingerprint = get_dialect_pack_fingerprint(tmp_path / "general")
+    for name, pos in [("noun", "NOUN"), ("verb", "VERB")]:
+        write_POS_lexicon(tmp_path / f"{name}.sqlite", fingerprint, [("ལས", pos, [])])
+
+    try:
+        lexicon = open_POS_lexicon(tmp_path / "noun.sqlite")
+        lexicon.dialect_pack_path = tmp_path / "general"
+        assert get_POS("ལས་") == "NOUN"
+
+        lexicon = open_POS_lexicon(tmp_path / "verb.sqlite")
+        lexicon.dialect_pack_path = tmp_path / "general"
+        assert get_POS("ལས་") == "VERB"
+    finally:
+        close_POS_lexicon()
+    assert get_POS_cache_stats()["size"] == 0
+
+
+def test_pos_lexicon_miss_falls_back_to_botok(tmp_path):
+    # botok trie finds senses of compounds which have no key in the lexicon
+    word_string = "བཀྲ་ཤིས་ལས་"
+    expected = (get_word_senses(word_string), get_POS(word_string))
+
+    session = get_botok_session()
+    lexicon_path = tmp_path / "pos_lexicon.sqlite"
+    write_POS_lexicon(
+        lexicon_path,
+        get_dialect_pack_fingerprint(session.base_path / session.dialect_name),
+        [("ལས", "VERB", [{"pos": "VERB", "freq": 1, "affixed": False}])],
+    )
+    try:
+        open_POS_lexicon(lexicon_path)
+        assert (get_word_senses(word_string), get_POS(word_string)) == expected
+    finally:
+        close_POS_lexicon()
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from rules_generator.rdr_to_cql import (
+    collect_POS_words,
+    filter_only_neccessary_rdr_rules,
+    generate_cql_rules,
+    parse_rdr_rules,
+)
+
+DATA_DIR = Path(__file__).parent.parent / "src" / "rules_generator" / "data"
+
+
+def test_generate_cql_rules_from_collected_POS_words():
+    rdr_string = (DATA_DIR / "TIB_demo.RDR").read_text(encoding="utf-8")
+    rdr_rules = filter_only_neccessary_rdr_rules(parse_rdr_rules(rdr_string))
+
+    assert collect_POS_words(rdr_rules) == ["ལ་", "ལ་ལ་"]
+
+    words_POS = {"ལ་": "NOUN", "ལ་ལ་": "NO_POS"}
+    assert generate_cql_rules(rdr_rules, words_POS.__getitem__) == (
+        '["ལ་ལ་"] ["ལ་ལ་"]\t1-2\t::\t[pos="NOUN"][pos="NOUN"]\n'
+        '["ལ་"] ["ལ་"] ["ལ་ལ་"]\t3-2\t::\t[pos="NOUN"][pos="NOUN"]\n'
+        '["ལ་"] ["ལ་"] ["ལ་"] ["ལ་"]\t2\t+\t[]\n'
+    )
@@ -0,0 +1,282 @@
+import re
+
+import pytest
+
+from rules_generator.RDRPOSTagger.SCRDRlearner import SCRDRTreeLearner as learner
+from rules_generator.RDRPOSTagger.SCRDRlearner.ImprovementQueue import ImprovementQueue
+from rules_generator.RDRPOSTagger.SCRDRlearner.Node import Node
+from rules_generator.RDRPOSTagger.SCRDRlearner.Object import Object, getObjectDictionary
+from rules_generator.RDRPOSTagger.SCRDRlearner.ObjectStore import Vocabulary
+from rules_generator.RDRPOSTagger.SCRDRlearner.Rule import TAG_SLOT, Condition
+from rules_generator.RDRPOSTagger.SCRDRlearner.RuleCache import RuleCache
+from rules_generator.RDRPOSTagger.SCRDRlearner.RuleIndex import RuleIndex
+from rules_generator.RDRPOSTagger.SCRDRlearner.SCRDRTree import SCRDRTree
+from rules_generator.RDRPOSTagger.SCRDRlearner.SCRDRTreeLearner import SCRDRTreeLearner
+from rules_generator.tagger import group_POS_by_sentence
+
+GOLD_CORPUS = (
+    "ཕྱག་/B འཚལ་/I ལོ/I །_།/U བློ་/B ཆུང་/I དག་/U ལ་/U །_/U ལ་/B ལ་/I ཡོད/U །_/U "
+    "ཕྱག་/B འཚལ་/I ལོ/I །_།/U ལ་/U ཕྱག་/U ཡོད/U །_/U ལ་/B ལ་/I ཡོད/U །_/U"
+)
+INITIALIZED_CORPUS = re.sub(r"/[BIUXY]+", "/U", GOLD_CORPUS)
+
+
+def get_POS(word_tag):
+    if "།" in word_tag:
+        return "PUNCT"
+    if word_tag.startswith("ཕྱག") or word_tag.startswith("བློ"):
+        return "NOUN"
+    return "PART"
+
+
+POS_LIST = [get_POS(word_tag) for word_tag in INITIALIZED_CORPUS.split()]
+SENTENCES_POS = group_POS_by_sentence(INITIALIZED_CORPUS, POS_LIST)
+
+EXPECTED_RDR = (
+    'True : object.conclusion = "NN"\n'
+    '\tobject.tag == "U" : object.conclusion = "U"\n'
+    '\t\tobject.word == "ཕྱག་" and object.nextPos1 == "PART" and object.nextPos2 == "PART"'
+    ' : object.conclusion = "B"\n'
+    '\t\tobject.word == "ལ་" and object.nextPos1 == "PART" and object.nextPos2 == "PART"'
+    ' : object.conclusion = "B"\n'
+    '\t\tobject.prevPos1 == "NOUN" and object.word == "འཚལ་" and object.nextPos1 == "PART"'
+    ' and object.nextPos2 == "PUNCT" : object.conclusion = "I"\n'
+    '\t\tobject.prevPos2 == "NOUN" and object.prevPos1 == "PART" and object.word == "ལོ"'
+    ' and object.nextPos1 == "PUNCT" : object.conclusion = "I"\n'
+    '\t\tobject.prevPos1 == "PART" and object.word == "ལ་" and object.nextPos1 == "PART"'
+    ' and object.nextPos2 == "PUNCT" : object.conclusion = "I"\n'
+)
+
+
+def learn_tree(tmp_path, *args, **kwargs):
+    tree = SCRDRTreeLearner(*args, **kwargs)
+    tree.learnRDRTree(INITIALIZED_CORPUS, GOLD_CORPUS, True, SENTENCES_POS)
+    return tree, tree.writeToFile(tmp_path / "tree.RDR", True)
+
+
+def test_learn_rdr_tree(tmp_path):
+    tree, rdr_string = learn_tree(tmp_path, 2, 1, deduplicate=False)
+    assert rdr_string == EXPECTED_RDR
+
+    objectStore = tree.objectStore
+    assert len(objectStore) == len(POS_LIST)
+    assert len(objectStore.vocabulary) < 3 * len(POS_LIST)
+
+    cornerstoneCases = tree.root.exceptChild.exceptChild.cornerstoneCases
+    assert cornerstoneCases == [0, 13]
+    object = objectStore.getObject(cornerstoneCases[1])
+    assert (object.prevWord1, object.word, object.nextWord1) == ("", "ཕྱག་", "འཚལ་")
+    assert (object.tag, object.pos, object.nextPos2) == ("U", "NOUN", "PART")
+
+
+def test_learn_rdr_tree_with_weighted_objects(tmp_path):
+    tree, rdr_string = learn_tree(tmp_path, 2, 1)
+    assert rdr_string == EXPECTED_RDR
+
+    # Identical windows with the same correct tag are stored once
+    objectStore = tree.objectStore
+    assert len(objectStore) < len(POS_LIST)
+    assert sum(objectStore.weights) == len(POS_LIST)
+
+    cornerstoneCases = tree.root.exceptChild.exceptChild.cornerstoneCases
+    assert cornerstoneCases == [0]
+    assert objectStore.weights[0] == 2
+
+
+def test_learn_rdr_tree_with_workers(tmp_path, monkeypatch):
+    # Every object set of more than 2 objects is counted by shards in the pool
+    monkeypatch.setattr(learner, "RULE_COUNTING_SHARD_SIZE", 1)
+    tree, rdr_string = learn_tree(tmp_path, 2, 1, workers=2)
+    assert rdr_string == EXPECTED_RDR
+    assert tree.executor is None
+
+
+def test_learn_subtrees_in_parallel(tmp_path):
+    # One subtree for each of the initialized tags U and B
+    initialized_corpus = re.sub(r"/[BIUXY]+", "/B", GOLD_CORPUS).replace("/B", "/U", 8)
+    trees = []
+    for kwargs in [{}, {"workers": 2, "parallelSubtrees": True}]:
+        tree = SCRDRTreeLearner(2, 1, **kwargs)
+        tree.learnRDRTree(initialized_corpus, GOLD_CORPUS, True, SENTENCES_POS)
+        trees.append(tree)
+    serialTree, parallelTree = trees
+
+    assert parallelTree.writeToFile(tmp_path / "tree.RDR", True) == (
+        serialTree.writeToFile(tmp_path / "tree.RDR", True)
+    )
+    serialNode = serialTree.root.exceptChild.elseChild.exceptChild
+    parallelNode = parallelTree.root.exceptChild.elseChild.exceptChild
+    assert parallelNode.cornerstoneCases == serialNode.cornerstoneCases
+    assert parallelNode.father is parallelTree.root.exceptChild.elseChild
+
+
+def test_classify_with_learned_tree(tmp_path):
+    tree, _ = learn_tree(tmp_path, 2, 1)
+    node = tree.root.exceptChild.exceptChild
+    assert str(node.condition).startswith('object.word == "ཕྱག་" and ')
+
+    object = tree.objectStore.getObject(0)
+    tree.classify(object)
+    assert object.conclusion == "B"
+    object = tree.objectStore.getObject(1)
+    tree.classify(object)
+    assert object.conclusion == "I"
+
+
+def test_rule_cache(tmp_path):
+    tree, _ = learn_tree(tmp_path, 2, 1)
+    ruleCache = tree.ruleCache
+    # Every object is indexed by the layer-2 learning, its rules are generated once
+    assert len(ruleCache) == len(tree.objectStore)
+    assert ruleCache.getMemoryUsage() > 0
+
+    cache = RuleCache()
+    a, b = ((0, 1),), ((0, 2),)
+    assert list(cache.add(5, [a, b])) == [0, 1]
+    assert list(cache.add(6, [b])) == [1]
+    assert cache.getRule(1) == b
+    assert 6 in cache and cache.get(7) is None
+
+
+def test_rule_index():
+    a, b, c = ((0, 1),), ((0, 2),), ((3, 1), (0, 1))
+    index = RuleIndex([(0, [a, c]), (1, [a, b]), (2, [b, c])], ruleNotIn={c})
+
+    assert index.counts == {a: 2, b: 2}
+    assert index.postings == {a: [0, 1], b: [1, 2]}
+
+    index.cover(index.postings[a])
+    assert index.counts == {a: 0, b: 1}
+    index.cover(index.postings[b])
+    assert index.counts == {a: -1, b: -1}
+
+
+def test_improvement_queue():
+    a, b, c = ((0, 1),), ((0, 2),), ((3, 1), (0, 1))
+    wrongIndex = RuleIndex([(0, [a, b]), (1, [b, c]), (2, [a, b])])
+    correctIndex = RuleIndex([(3, [b]), (4, [b, c]), (5, [a])])
+    queue = ImprovementQueue(wrongIndex, correctIndex)
+
+    # a: 2 - 1, b: 3 - 2, c: 1 - 1, a is the first rule of object 0
+    assert queue.getBestRule() == (a, 1)
+    assert queue.getUpperBound() == 1
+
+    # a: 1 - 1, b: 2 - 2, c: 1 - 1, b is now the first rule of object 1
+    wrongIndex.remove([0])
+    # The stale entry of a still bounds the improvements
+    assert queue.getUpperBound() == 1
+    assert wrongIndex.getMatchingObjects(a) == [2]
+    assert queue.getBestRule() == (b, 0)
+
+    # b: 2 - 1, c: 1 - 0
+    correctIndex.remove([4])
+    queue.update([b, c])
+    assert queue.getBestRule() == (b, 1)
+
+    wrongIndex.remove([1, 2])
+    assert queue.getBestRule() == (None, None)
+
+
+def test_tree_with_long_rule_chain(tmp_path):
+    vocabulary = Vocabulary()
+    isB = Condition(((TAG_SLOT, vocabulary.getId("B")),), vocabulary)
+    isU = Condition(((TAG_SLOT, vocabulary.getId("U")),), vocabulary)
+    root = Node(Condition((), vocabulary), "NN", None, None, None, [], 0)
+    node = root.exceptChild = Node(isB, "B", root, None, None, [], 1)
+    for _ in range(50000):
+        node.elseChild = Node(isB, "B", node, None, None, [], 1)
+        node = node.elseChild
+    node.elseChild = Node(isU, "U", node, None, None, [], 1)
+    node.elseChild.exceptChild = Node(isU, "I", node.elseChild, None, None, [], 2)
+    tree = SCRDRTree(root)
+
+    object = Object("ལ་", "U")
+    tree.classify(object)
+    assert object.conclusion == "I"
+
+    rdr_lines = tree.writeToFile(tmp_path / "tree.RDR", True).splitlines()
+    assert len(rdr_lines) == 50004
+    assert rdr_lines[-2:] == [
+        '\tobject.tag == "U" : object.conclusion = "U"',
+        '\t\tobject.tag == "U" : object.conclusion = "I"',
+    ]
+
+
+def test_coverage_matrix():
+    pytest.importorskip("numpy")
+    from rules_generator.RDRPOSTagger.SCRDRlearner.CoverageMatrix import CoverageMatrix
+
+    a, b, c = ((0, 1),), ((0, 2),), ((3, 1), (0, 1))
+    wrongIndex = RuleIndex([(0, [a, b]), (1, [b, c]), (2, [a, b])])
+    correctIndex = RuleIndex([(3, [b]), (4, [b, c]), (5, [a])])
+    matrix = CoverageMatrix(wrongIndex, correctIndex)
+    assert matrix.getBestRule() == (a, 1)
+    # b matches 3 target objects
+    assert matrix.getUpperBound() == 3
+
+    wrongIndex.remove([0])
+    matrix.update([], [0])
+    assert matrix.getBestRule() == (b, 0)
+
+    correctIndex.remove([4])
+    matrix.update([b, c], [4])
+    assert matrix.getBestRule() == (b, 1)
+
+    wrongIndex.remove([1, 2])
+    matrix.update([], [1, 2])
+    assert matrix.getBestRule() == (None, None)
+
+
+def test_learn_rdr_tree_with_bitset_backend(tmp_path):
+    pytest.importorskip("numpy")
+    _, rdr_string = learn_tree(tmp_path, 2, 1, improvementBackend="bitset")
+    assert rdr_string == EXPECTED_RDR
+
+
+def test_learn_rdr_tree_with_rule_templates(tmp_path):
+    _, rdr_string = learn_tree(tmp_path, 2, 1, ruleTemplates="full")
+    assert rdr_string == EXPECTED_RDR
+    assert re.search(r"object\.\w*pos", rdr_string, re.IGNORECASE)
+
+    # Rules only test the words of the window
+    _, rdr_string = learn_tree(tmp_path, 2, 1, ruleTemplates="word")
+    assert "object.word ==" in rdr_string
+    assert "object.pos" not in rdr_string
+    # Nor prevPos1, nextPos2...
+    assert re.search(r"object\.\w*pos", rdr_string, re.IGNORECASE) is None
+
+    with pytest.raises(ValueError):
+        SCRDRTreeLearner(ruleTemplates="unknown")
+
+
+def test_estimate_rule_candidates(tmp_path):
+    reports = []
+    for ruleTemplates in ["full", "word-window1"]:
+        tree = SCRDRTreeLearner(2, 1, ruleTemplates=ruleTemplates)
+        reports.append(
+            tree.estimateRuleCandidates(
+                INITIALIZED_CORPUS, GOLD_CORPUS, True, SENTENCES_POS
+            )
+        )
+    full, small = reports
+    assert full.occurrences == small.occurrences == len(POS_LIST)
+    assert small.objects == len(tree.objectStore)
+    assert small.candidates == len(tree.ruleCache.rules)
+    assert small.candidates < full.candidates
+    assert small.ruleOccurrences < full.ruleOccurrences
+
+    with pytest.raises(ValueError, match="budget"):
+        learn_tree(tmp_path, 2, 1, candidateBudget=full.candidates - 1)
+    _, rdr_string = learn_tree(tmp_path, 2, 1, candidateBudget=full.candidates)
+    assert rdr_string == EXPECTED_RDR
+
+
+def test_object_dictionary_with_mismatched_sentence_POS():
+    # Each sentence gets its own POS, a missing POS is not taken from the next sentence
+    sentences_POS = [list(sentence_POS) for sentence_POS in SENTENCES_POS]
+    assert len(sentences_POS) > 1
+    sentences_POS[0].pop()
+    assert (
+        getObjectDictionary(INITIALIZED_CORPUS, GOLD_CORPUS, True, sentences_POS)
+        is None
+    )
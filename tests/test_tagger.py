@@ -1,4 +1,4 @@
-from rules_generator.tagger import tagger
+from rules_generator.tagger import tagger, tagger_iter
 
 
 def test_tagger():
@@ -8,3 +8,35 @@ def test_tagger():
         )
         == "༄༅།_།/U རྒྱལ་པོ་/U ལ་/U གཏམ་/U བྱ་བ་/U རིན་པོ་ཆེ-འི་/U ཕྲེང་་་བ/U །_/U ལ་ལ་/BB ལ་ལ་/IB ལ་བ་/U ཡོད/U །_/U དཔལ/U །_/U དགེ-འོ་/B བཀྲ་ཤིས་ཤོག/BIB །/U "  # noqa
     )
+
+
+def test_tagger_iter():
+    gold_corpus = "༄༅། །རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་ རིན་པོ་ཆེ འི་ ཕྲེང་་་བ། ལ་ ལ་ལ་ ལ་ ལ་བ་ ཡོད། དཔལ། དགེའོ་ བཀྲ་ཤིས་ ཤོག།"
+    tagged_segments = list(tagger_iter(gold_corpus, chunk_size=10))
+    assert len(tagged_segments) > 1
+    assert "".join(tagged_segments) == tagger(gold_corpus)
+
+
+def test_tagger_with_workers():
+    gold_corpus = "༄༅། །རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་ རིན་པོ་ཆེ འི་ ཕྲེང་་་བ། ལ་ ལ་ལ་ ལ་ ལ་བ་ ཡོད། དཔལ། དགེའོ་ བཀྲ་ཤིས་ ཤོག།"
+    assert tagger(gold_corpus, workers=2) == tagger(gold_corpus)
+
+
+def test_tagger_with_quarantine():
+    gold_corpus = "༄༅། །རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་ རིན་པོ་ཆེ འི་ ཕྲེང་་་བ། ལ་ ལ་ལ་ ལ་ ལ་བ་ ཡོད། དཔལ། དགེའོ་ བཀྲ་ཤིས་ ཤོག།"
+    quarantine = []
+    assert tagger(gold_corpus, quarantine=quarantine) == tagger(gold_corpus)
+    assert quarantine == []
+
+
+def test_tagger_quarantines_mismatching_sentence():
+    # The tab before the shad of the second sentence changes botok output but not
+    # its syllables
+    gold_corpus = "ཀ་ ཁ། ག་ ང\t། ཅ་ ཆ། ཇ། "
+    quarantine = []
+    tagged_content = tagger(gold_corpus, quarantine=quarantine)
+
+    assert [(region.start, region.end) for region in quarantine] == [(6, 13)]
+    assert gold_corpus[6:13] == "ག་ ང\t། "
+    assert "ཀ་/" in tagged_content and "ཅ་/" in tagged_content
+    assert "ག་/" not in tagged_content
@@ -0,0 +1,64 @@
+from rules_generator.Utility.tokenization_cache import TokenizationCache
+
+
+def test_tokenization_cache(tmp_path):
+    cache_path = tmp_path / "botok_cache.sqlite"
+
+    with TokenizationCache(cache_path) as cache:
+        assert cache.get("words", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།") is None
+        cache.set("words", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།", "ལ་ལ་ ལ་ལ་ ལ་བ་ ཡོད །")
+        assert cache.get("pos", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།") is None
+        assert cache.get_or_tokenize("words", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།", str.split) == (
+            "ལ་ལ་ ལ་ལ་ ལ་བ་ ཡོད །"
+        )
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 2
+
+    # Entries are kept on disk
+    with TokenizationCache(cache_path) as cache:
+        assert cache.get("words", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།") == "ལ་ལ་ ལ་ལ་ ལ་བ་ ཡོད །"
+
+
+def test_tokenization_cache_eviction(tmp_path):
+    with TokenizationCache(tmp_path / "botok_cache.sqlite", max_size=10) as cache:
+        cache.set("words", "ཀ", "ཀཀཀ")
+        cache.set("words", "ཁ", "ཁཁཁ")
+        cache.get("words", "ཀ")
+        cache.commit()
+
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get("words", "ཁ") is None
+        assert cache.get("words", "ཀ") == "ཀཀཀ"
+
+
+def test_tokenization_cache_eviction_shared_file(tmp_path):
+    cache_path = tmp_path / "botok_cache.sqlite"
+    with TokenizationCache(cache_path, max_size=10) as first_cache, TokenizationCache(
+        cache_path, max_size=10
+    ) as second_cache:
+        first_cache.set("words", "ཀ", "ཀཀ")
+        first_cache.commit()
+        second_cache.set("words", "ཁ", "ཁཁ")
+        second_cache.commit()
+
+        assert second_cache.get_stats()["evictions"] == 1
+        assert second_cache.get_stats()["size"] == 6
+        assert first_cache.get("words", "ཀ") is None
+        assert first_cache.get("words", "ཁ") == "ཁཁ"
+
+
+def test_tokenization_cache_dialect_pack_change(tmp_path):
+    dictionary_path = tmp_path / "general" / "dictionary" / "words"
+    dictionary_path.mkdir(parents=True)
+    (dictionary_path / "words.tsv").write_text("ལ་ལ\n", encoding="utf-8")
+    cache_path = tmp_path / "botok_cache.sqlite"
+
+    with TokenizationCache(cache_path, base_path=tmp_path) as cache:
+        cache.set("words", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།", "ལ་ལ་ ལ་ལ་ ལ་བ་ ཡོད །")
+    with TokenizationCache(cache_path, base_path=tmp_path) as cache:
+        assert cache.get("words", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།") == "ལ་ལ་ ལ་ལ་ ལ་བ་ ཡོད །"
+
+    # Changing the dictionary files of the dialect pack invalidates the entries
+    (dictionary_path / "words.tsv").write_text("ལ་ལ\nལ་བ\n", encoding="utf-8")
+    with TokenizationCache(cache_path, base_path=tmp_path) as cache:
+        assert cache.get("words", "ལ་ལ་ལ་ལ་ལ་བ་ཡོད།") is None
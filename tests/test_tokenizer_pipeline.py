@@ -1,4 +1,8 @@
-from rules_generator.tokenizer_pipeline import botok_word_tokenizer_pipeline
+from rules_generator.RDRPOSTagger.Utility.Get_token_attributes import Get_POS_list
+from rules_generator.tokenizer_pipeline import (
+    botok_word_tokenizer_pipeline,
+    botok_word_tokenizer_pipeline_with_POS,
+)
 
 
 # The input is a gold corpus, but the string is preprocessed(no spaces) before botok does max match, so there
@@ -10,3 +14,22 @@ def test_botok_word_tokenizer_pipeline():
         )
         == "༄༅།_། རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་ རིན་པོ་ཆེ-འི་ ཕྲེང་་་བ །_ ལ་ལ་ ལ་ལ་ ལ་བ་ ཡོད །_ དཔལ །_ དགེ-འོ་ བཀྲ་ཤིས་ཤོག །"
     )
+
+
+def test_botok_word_tokenizer_pipeline_with_POS():
+    gold_corpus = (
+        "༄༅། །རྒྱལ་པོ་ ལ་ གཏམ་ བྱ་བ་ རིན་པོ་ཆེ འི་ ཕྲེང་་་བ། ལ་ ལ་ལ་ ལ་ ལ་བ་ ཡོད།"
+    )
+    tokenized_text, words_POS = botok_word_tokenizer_pipeline_with_POS(gold_corpus)
+
+    assert tokenized_text == botok_word_tokenizer_pipeline(gold_corpus)
+    # One POS per word, རིན་པོ་ཆེ-འི་ gets the POS of the whole word
+    assert len(words_POS) == len(tokenized_text.split())
+
+
+def test_affixed_word_POS():
+    tokenized_text, words_POS = botok_word_tokenizer_pipeline_with_POS("བོད་པ འི་ ཡུལ།")
+    assert tokenized_text.split()[0] == "བོད་པ-འི་"
+    # The RDR learner gets the POS botok gives to the word without splitting its
+    # affix, not the POS of བོད་པ
+    assert words_POS[0] == Get_POS_list("བོད་པའི་")[0]